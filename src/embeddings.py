@@ -1,10 +1,31 @@
 """Embedding providers for memAlpha."""
 
 import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
 from abc import ABC, abstractmethod
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import httpx
+import numpy as np
+import orjson
 from sentence_transformers import SentenceTransformer
-from openai import OpenAI
+from openai import DefaultHttpxClient, OpenAI
+
+try:
+    from huggingface_hub import hf_hub_download
+    from huggingface_hub.utils import EntryNotFoundError, LocalEntryNotFoundError
+    from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import AutoTokenizer
+except ImportError:  # Optional: pip install "memalpha[onnx]"
+    ORTModelForFeatureExtraction = None
+
+
+# A batch of embedding vectors, one per row
+Embeddings = Union[List[List[float]], np.ndarray]
 
 
 class EmbeddingProvider(ABC):
@@ -35,14 +56,14 @@ class EmbeddingProvider(ABC):
         pass
 
     @abstractmethod
-    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+    def embed_batch(self, texts: List[str]) -> Embeddings:
         """Generate embeddings for multiple texts.
         
         Args:
             texts: List of texts to embed
             
         Returns:
-            List of embedding vectors
+            Embedding vectors, as a list of lists or a 2-D numpy array
         """
         pass
 
@@ -53,17 +74,86 @@ class EmbeddingProvider(ABC):
         pass
 
 
+class EmbeddingCache:
+    """Thread-safe LRU cache of single-text embeddings.
+    
+    Agents tend to repeat the same search queries, and embedding a query is
+    by far the slowest part of a search, so caching it turns a model call
+    into a dict lookup.
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        """Initialize an empty cache.
+        
+        Args:
+            maxsize: Maximum number of embeddings kept; 0 disables caching
+        """
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, Tuple[float, ...]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, text: str, embed: Callable[[str], List[float]]) -> List[float]:
+        """Return the embedding of a text, computing it on a cache miss.
+        
+        Args:
+            text: Text to embed
+            embed: Function that embeds a single text
+            
+        Returns:
+            List of floats representing the embedding vector
+        """
+        with self._lock:
+            cached = self._entries.get(text)
+            if cached is not None:
+                self._entries.move_to_end(text)
+                return list(cached)
+        
+        # Embed outside the lock so a slow model call doesn't block hits
+        embedding = embed(text)
+        if self.maxsize > 0:
+            with self._lock:
+                self._entries[text] = tuple(embedding)
+                self._entries.move_to_end(text)
+                if len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return list(embedding)
+
+    def clear(self) -> None:
+        """Drop every cached embedding."""
+        with self._lock:
+            self._entries.clear()
+
+
 class LocalEmbedding(EmbeddingProvider):
     """Local embedding provider using sentence-transformers."""
 
-    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
+    # Dimensions of common models, so reading them doesn't load the model
+    MODEL_DIMENSIONS = {
+        "all-MiniLM-L6-v2": 384,
+        "all-MiniLM-L12-v2": 384,
+        "all-mpnet-base-v2": 768,
+        "multi-qa-MiniLM-L6-cos-v1": 384,
+        "paraphrase-MiniLM-L6-v2": 384,
+        "paraphrase-multilingual-MiniLM-L12-v2": 384,
+        "BAAI/bge-small-en-v1.5": 384,
+        "BAAI/bge-base-en-v1.5": 768,
+    }
+
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2", batch_size: int = 64):
         """Initialize local embedding provider.
         
         Args:
             model_name: Name of the sentence-transformers model
+            batch_size: Number of texts per forward pass in embed_batch
         """
         self._model_name = model_name
+        self.batch_size = batch_size
         self._model = None  # Lazy loading
+        self._load_lock = threading.Lock()  # Tool calls may embed from several threads
+        self._dim: Optional[int] = None
 
     @property
     def provider_name(self) -> str:
@@ -76,27 +166,277 @@ class LocalEmbedding(EmbeddingProvider):
     def _load_model(self):
         """Load the model lazily on first use."""
         if self._model is None:
-            self._model = SentenceTransformer(self._model_name)
+            with self._load_lock:
+                if self._model is None:
+                    self._model = SentenceTransformer(self._model_name)
 
     def embed(self, text: str) -> List[float]:
         """Generate embedding for a single text."""
         self._load_model()
-        embedding = self._model.encode([text])[0]
+        embedding = self._model.encode([text], show_progress_bar=False)[0]
         # Handle both numpy arrays and lists (for testing)
         return embedding.tolist() if hasattr(embedding, 'tolist') else embedding
 
-    def embed_batch(self, texts: List[str]) -> List[List[float]]:
-        """Generate embeddings for multiple texts."""
+    def embed_batch(self, texts: List[str]) -> np.ndarray:
+        """Generate embeddings for multiple texts as a (len(texts), dim) array."""
         self._load_model()
-        embeddings = self._model.encode(texts)
-        # Handle both numpy arrays and lists (for testing)
-        return [emb.tolist() if hasattr(emb, 'tolist') else emb for emb in embeddings]
+        # encode() already sorts inputs by length internally so each mini-batch
+        # pads to similar lengths; we only pick the batch size and keep the
+        # progress bar off (it is enabled whenever logging is at INFO).
+        embeddings = self._model.encode(
+            texts,
+            batch_size=self.batch_size,
+            show_progress_bar=False,
+            convert_to_numpy=True
+        )
+        # ChromaDB accepts arrays directly, so skip building Python float lists
+        return np.asarray(embeddings, dtype=np.float32)
 
     @property
     def dimension(self) -> int:
         """Return the dimension of the embedding vectors."""
+        if self._dim is None:
+            self._dim = self.MODEL_DIMENSIONS.get(self._model_name)
+            if self._dim is None:
+                self._load_model()
+                self._dim = self._model.get_sentence_embedding_dimension()
+        return self._dim
+
+
+# sentence-transformers pooling flags ("pooling_mode_<name>") and our name for each
+_POOLING_FLAGS = {
+    "cls_token": "cls",
+    "mean_tokens": "mean",
+    "max_tokens": "max",
+    "mean_sqrt_len_tokens": "mean_sqrt_len",
+    "weightedmean_tokens": "weightedmean",
+    "lasttoken": "lasttoken",
+}
+
+
+def _pooling_mode(config: Dict[str, Any]) -> str:
+    """Read the pooling mode from a sentence-transformers Pooling config.
+    
+    Args:
+        config: Contents of the model's 1_Pooling/config.json ({} if it has none)
+        
+    Returns:
+        'mean' or 'cls'; models without a config are mean-pooled, as
+        sentence-transformers does for plain transformer models
+        
+    Raises:
+        ValueError: If the model uses any other pooling
+    """
+    modes = [mode for flag, mode in _POOLING_FLAGS.items() if config.get(f"pooling_mode_{flag}")]
+    if not modes:
+        return "mean"
+    if modes in (["mean"], ["cls"]):
+        return modes[0]
+    raise ValueError(
+        f"ONNX embeddings support mean or CLS pooling, but the model uses: {', '.join(modes)}"
+    )
+
+
+class ONNXEmbedding(EmbeddingProvider):
+    """Local embedding provider running sentence-transformers models on ONNX Runtime.
+    
+    The model is exported to ONNX on first use and, by default, dynamically
+    quantized to int8 (using VNNI dot-product instructions where the CPU has
+    them). The exported model is cached under the memAlpha models directory.
+    """
+
+    # Longest input in tokens; matches sentence-transformers' MiniLM default
+    MAX_SEQ_LENGTH = 256
+
+    # Pooling config of sentence-transformers models, and where a copy is cached
+    POOLING_CONFIG = "1_Pooling/config.json"
+    POOLING_CACHE_FILE = "pooling_config.json"
+
+    def __init__(
+        self,
+        model_name: str = "all-MiniLM-L6-v2",
+        batch_size: int = 64,
+        quantize: bool = True,
+        cache_dir: Optional[str] = None
+    ):
+        """Initialize ONNX embedding provider.
+        
+        Args:
+            model_name: Name of the sentence-transformers model
+            batch_size: Number of texts per forward pass in embed_batch
+            quantize: Whether to quantize the exported model to int8
+            cache_dir: Where exported models are stored
+                (default: ~/.local/share/memalpha/models/onnx)
+            
+        Raises:
+            ImportError: If optimum[onnxruntime] is not installed
+        """
+        if ORTModelForFeatureExtraction is None:
+            raise ImportError(
+                "ONNX embeddings require optimum[onnxruntime]. "
+                "Install with: pip install \"memalpha[onnx]\""
+            )
+        
+        self._model_name = model_name
+        self.batch_size = batch_size
+        self.quantize = quantize
+        if cache_dir is None:
+            cache_dir = os.path.expanduser("~/.local/share/memalpha/models/onnx")
+        self.cache_dir = Path(cache_dir)
+        self._model = None  # Lazy loading
+        self._tokenizer = None
+        self._pooling = "mean"  # Read from the model's pooling config on load
+        self._load_lock = threading.Lock()
+        self._dim: Optional[int] = LocalEmbedding.MODEL_DIMENSIONS.get(model_name)
+
+    @property
+    def provider_name(self) -> str:
+        return "onnx"
+
+    @property
+    def model_name(self) -> str:
+        return self._model_name
+
+    def _load_model(self):
+        """Export (and quantize) the model on first use, then load it."""
+        if self._model is not None:
+            return
+        with self._load_lock:
+            if self._model is None:
+                self._export_and_load()
+
+    def _export_and_load(self):
+        """Export the model to ONNX unless cached, then load it and its tokenizer."""
+        # Bare names refer to the sentence-transformers organisation on the Hub
+        repo_id = self._model_name
+        if "/" not in repo_id:
+            repo_id = f"sentence-transformers/{repo_id}"
+        
+        suffix = "int8" if self.quantize else "fp32"
+        save_dir = self.cache_dir / f"{self._model_name.replace('/', '__')}-{suffix}"
+        file_name = "model_quantized.onnx" if self.quantize else "model.onnx"
+        
+        if not (save_dir / file_name).exists():
+            model = ORTModelForFeatureExtraction.from_pretrained(repo_id, export=True)
+            model.save_pretrained(save_dir)
+            AutoTokenizer.from_pretrained(repo_id).save_pretrained(save_dir)
+            if self.quantize:
+                quantizer = ORTQuantizer.from_pretrained(model)
+                config = AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+                quantizer.quantize(save_dir=save_dir, quantization_config=config)
+        
+        self._pooling = self._load_pooling(repo_id, save_dir)
+        self._tokenizer = AutoTokenizer.from_pretrained(save_dir)
+        self._model = ORTModelForFeatureExtraction.from_pretrained(
+            save_dir, file_name=file_name, provider="CPUExecutionProvider"
+        )
+
+    def _load_pooling(self, repo_id: str, save_dir: Path) -> str:
+        """Read the model's pooling mode, fetching its pooling config once.
+        
+        The ONNX export only covers the transformer, so the pooling that
+        sentence-transformers would apply (e.g. CLS for BAAI/bge models) comes
+        from the model's Pooling module config.
+        
+        Args:
+            repo_id: Hugging Face Hub repository of the model
+            save_dir: Directory of the exported model
+            
+        Returns:
+            'mean' or 'cls'
+        """
+        cache_path = save_dir / self.POOLING_CACHE_FILE
+        if not cache_path.exists():
+            try:
+                with open(hf_hub_download(repo_id, self.POOLING_CONFIG), 'rb') as f:
+                    payload = f.read()
+            except LocalEntryNotFoundError:
+                raise  # Offline; don't cache a guess
+            except EntryNotFoundError:
+                payload = b"{}"  # Not a sentence-transformers model
+            save_dir.mkdir(parents=True, exist_ok=True)
+            cache_path.write_bytes(payload)
+        
+        with open(cache_path, 'rb') as f:
+            return _pooling_mode(orjson.loads(f.read()))
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """Run one forward pass and pool token embeddings like the model's Pooling module."""
+        inputs = self._tokenizer(
+            texts,
+            padding=True,
+            truncation=True,
+            max_length=self.MAX_SEQ_LENGTH,
+            return_tensors="np"
+        )
+        outputs = self._model(**inputs)
+        tokens = np.asarray(outputs.last_hidden_state, dtype=np.float32)
+        
+        if self._pooling == "cls":
+            pooled = tokens[:, 0]
+        else:
+            # Mean over real tokens
+            mask = inputs["attention_mask"][..., None].astype(np.float32)
+            pooled = (tokens * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+        
+        # L2-normalize like sentence-transformers
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return pooled / np.maximum(norms, 1e-12)
+
+    def embed(self, text: str) -> List[float]:
+        """Generate embedding for a single text."""
         self._load_model()
-        return self._model.get_sentence_embedding_dimension()
+        return self._encode([text])[0].tolist()
+
+    def embed_batch(self, texts: List[str]) -> np.ndarray:
+        """Generate embeddings for multiple texts as a (len(texts), dim) array."""
+        self._load_model()
+        if not texts:
+            return np.empty((0, self.dimension), dtype=np.float32)
+        
+        # Group similar lengths into the same forward pass to limit padding
+        order = np.argsort([len(text) for text in texts], kind="stable")
+        embeddings = None
+        for start in range(0, len(texts), self.batch_size):
+            positions = order[start:start + self.batch_size]
+            batch = self._encode([texts[i] for i in positions])
+            if embeddings is None:
+                embeddings = np.empty((len(texts), batch.shape[1]), dtype=np.float32)
+            embeddings[positions] = batch
+        return embeddings
+
+    @property
+    def dimension(self) -> int:
+        """Return the dimension of the embedding vectors."""
+        if self._dim is None:
+            self._load_model()
+            self._dim = self._model.config.hidden_size
+        return self._dim
+
+
+def _positive_int_env(name: str, default: int) -> int:
+    """Read a positive integer setting from the environment.
+    
+    Args:
+        name: Environment variable name
+        default: Value used when the variable is not set
+        
+    Returns:
+        The setting's value
+        
+    Raises:
+        ValueError: If the variable is not an integer of at least 1
+    """
+    value = os.getenv(name)
+    if value is None:
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise ValueError(f"{name} must be an integer of at least 1, got {value!r}")
+    return number
 
 
 class OpenAIEmbedding(EmbeddingProvider):
@@ -109,6 +449,9 @@ class OpenAIEmbedding(EmbeddingProvider):
         "text-embedding-ada-002": 1536,
     }
 
+    # Retries per request on rate limits and transient connection errors
+    MAX_RETRIES = 3
+
     def __init__(self):
         """Initialize OpenAI embedding provider from environment variables."""
         self.api_key = os.getenv("MEMALPHA_OPENAI_API_KEY")
@@ -126,7 +469,30 @@ class OpenAIEmbedding(EmbeddingProvider):
             "text-embedding-3-small"
         )
 
-        self.client = OpenAI(api_key=self.api_key, base_url=self.base_url)
+        # Large batches are split into requests of at most batch_size texts
+        # (the API's per-request input limit), sent `concurrency` at a time
+        self.batch_size = _positive_int_env("MEMALPHA_OPENAI_BATCH_SIZE", 2048)
+        self.concurrency = _positive_int_env("MEMALPHA_OPENAI_CONCURRENCY", 5)
+
+        # Keep-alive HTTP/2 connections shared by all (concurrent) requests,
+        # so TLS handshakes are paid once and requests multiplex
+        self._http = DefaultHttpxClient(
+            http2=True,
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+            timeout=httpx.Timeout(60.0, connect=10.0)
+        )
+
+        # The SDK retries rate limits and connection errors with exponential backoff
+        self.client = OpenAI(
+            api_key=self.api_key,
+            base_url=self.base_url,
+            max_retries=self.MAX_RETRIES,
+            http_client=self._http
+        )
+
+    def close(self) -> None:
+        """Close the underlying HTTP connection pool."""
+        self._http.close()
 
     @property
     def provider_name(self) -> str:
@@ -144,14 +510,32 @@ class OpenAIEmbedding(EmbeddingProvider):
         )
         return response.data[0].embedding
 
-    def embed_batch(self, texts: List[str]) -> List[List[float]]:
-        """Generate embeddings for multiple texts using OpenAI API."""
+    def _embed_request(self, texts: List[str]) -> List[List[float]]:
+        """Embed one API request's worth of texts."""
         response = self.client.embeddings.create(
             model=self._model_name,
             input=texts
         )
         return [item.embedding for item in response.data]
 
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Generate embeddings for multiple texts using OpenAI API.
+        
+        Inputs larger than batch_size are split into several requests that
+        run concurrently; results are returned in input order.
+        """
+        batches = [
+            texts[start:start + self.batch_size]
+            for start in range(0, len(texts), self.batch_size)
+        ]
+        if len(batches) <= 1:
+            return self._embed_request(texts)
+
+        with ThreadPoolExecutor(max_workers=min(self.concurrency, len(batches))) as pool:
+            # map() yields results in submission order
+            results = pool.map(self._embed_request, batches)
+            return [embedding for batch in results for embedding in batch]
+
     @property
     def dimension(self) -> int:
         """Return the dimension of the embedding vectors."""
@@ -173,9 +557,11 @@ def get_embedding_provider() -> EmbeddingProvider:
         return LocalEmbedding()
     elif provider_name == "openai":
         return OpenAIEmbedding()
+    elif provider_name == "onnx":
+        return ONNXEmbedding()
     else:
         raise ValueError(
             f"Unknown embedding provider: {provider_name}. "
-            "Valid options are: 'local', 'openai'"
+            "Valid options are: 'local', 'openai', 'onnx'"
         )
 
@@ -1,18 +1,55 @@
 """Memory store implementation using ChromaDB."""
 
 import os
-import json
 import uuid
 import re
+import string
+import logging
+import queue
+import threading
+import time
+from collections import defaultdict
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime
 
 import chromadb
+import numpy as np
+import orjson
 from chromadb.config import Settings
+from chromadb.errors import ChromaError
 
 from src.models import Memory, MemoryCreate, MemoryUpdate, MemoryMetadata, SearchResult
-from src.embeddings import EmbeddingProvider
+from src.embeddings import EmbeddingCache, EmbeddingProvider
+from src.vector_index import QUANTIZATION_MODES, QuantizedIndex, _normalize
+
+
+logger = logging.getLogger("memalpha")
+
+# Candidates fetched from a quantized index per requested search result
+RERANK_FACTOR = 4
+
+# Distance metric for new collections; older collections keep ChromaDB's default 'l2'
+DISTANCE_SPACE = "cosine"
+
+# HNSW graph settings for new collections: a denser build and a search beam
+# wide enough for RERANK_FACTOR x the largest typical limit keep recall high
+HNSW_PARAMS = {
+    "hnsw:M": 16,
+    "hnsw:construction_ef": 200,
+    "hnsw:search_ef": 100,
+}
+
+# Characters not allowed in collection names
+_SANITIZE = re.compile(r'[^a-zA-Z0-9_-]')
+_SAFE_CHARS = frozenset(string.ascii_letters + string.digits + '_-')
+
+# Rows written in one batch share timestamps, so most parses are cache hits
+_parse_time = lru_cache(maxsize=4096)(datetime.fromisoformat)
+
+# Queue marker telling the background writer to exit
+_STOP = object()
 
 
 class MemoryStore:
@@ -21,26 +58,139 @@ class MemoryStore:
     def __init__(
         self,
         embedding_provider: EmbeddingProvider,
-        data_path: Optional[str] = None
+        data_path: Optional[str] = None,
+        quantization: Optional[str] = None,
+        async_writes: bool = False,
+        batch_size: int = 64,
+        flush_ms: int = 100,
+        query_cache_size: int = 4096,
+        client: Optional[Any] = None,
+        collection_prefix: str = ""
     ):
         """Initialize memory store.
         
         Args:
             embedding_provider: Embedding provider to use
             data_path: Path to store ChromaDB data (default: ~/.local/share/memalpha/chroma)
+            quantization: Search index mode, 'none', 'fp32', 'fp16', 'int8' or 'binary'
+                (default: MEMALPHA_QUANTIZE env var, or 'none')
+            async_writes: Queue store_memory calls and write them from a
+                background thread in batches. Memories are returned before
+                they are persisted and only become visible once flushed, so
+                this trades durability for throughput. Call flush() or
+                close() (or use the store as a context manager) to persist
+                pending writes.
+            batch_size: Maximum memories per background write
+            flush_ms: Maximum time a queued memory waits for a batch to fill
+            query_cache_size: Number of search query embeddings to cache (0 disables)
+            client: ChromaDB client to use instead of a persistent client at
+                data_path, e.g. one client shared by several stores
+            collection_prefix: Prefix for every collection name, so stores
+                sharing a client keep separate memories
+            
+        Raises:
+            ValueError: If unknown quantization mode is specified
         """
         self.embedding_provider = embedding_provider
+        self._query_cache = EmbeddingCache(query_cache_size)
+        
+        if quantization is None:
+            quantization = os.getenv("MEMALPHA_QUANTIZE", "none").lower()
+        if quantization not in QUANTIZATION_MODES:
+            raise ValueError(
+                f"Unknown quantization mode: {quantization}. "
+                f"Valid options are: {', '.join(repr(m) for m in QUANTIZATION_MODES)}"
+            )
+        self.quantization = quantization
+        
+        # Quantized search indexes by collection name, built lazily from ChromaDB
+        self._indexes: Dict[str, QuantizedIndex] = {}
+        self._index_lock = threading.RLock()
+        
+        # Collection handles by (project_id, agent_id)
+        self._coll_cache: Dict[Tuple[str, str], Any] = {}
+        self._name_cache: Dict[Tuple[str, str], str] = {}
+        self.collection_prefix = collection_prefix
         
         if data_path is None:
             data_path = os.path.expanduser("~/.local/share/memalpha/chroma")
         
         self.data_path = Path(data_path)
-        self.data_path.mkdir(parents=True, exist_ok=True)
         
         # Initialize ChromaDB client
-        self.client = chromadb.PersistentClient(
-            path=str(self.data_path)
-        )
+        if client is None:
+            self.data_path.mkdir(parents=True, exist_ok=True)
+            client = chromadb.PersistentClient(
+                path=str(self.data_path)
+            )
+        self.client = client
+        
+        # Background writer for async_writes
+        self.async_writes = async_writes
+        self.batch_size = batch_size
+        self.flush_ms = flush_ms
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        if async_writes:
+            self._writer = threading.Thread(
+                target=self._write_loop, name="memalpha-writer", daemon=True
+            )
+            self._writer.start()
+
+    def __enter__(self) -> "MemoryStore":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def flush(self) -> None:
+        """Block until every queued memory has been written."""
+        if self._writer is not None:
+            self._queue.join()
+
+    def close(self) -> None:
+        """Write pending memories and stop the background writer."""
+        if self._writer is not None:
+            self._queue.put(_STOP)
+            self._writer.join()
+            self._writer = None
+
+    def _write_loop(self) -> None:
+        """Consume queued memories and write them in batches."""
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                self._queue.task_done()
+                return
+            
+            # Gather more memories until the batch is full or flush_ms passed
+            batch = [item]
+            stop = False
+            deadline = time.monotonic() + self.flush_ms / 1000
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+            
+            try:
+                self._add_memories(batch)
+            except Exception:
+                logger.error(f"Failed to write {len(batch)} queued memories", exc_info=True)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            
+            if stop:
+                self._queue.task_done()
+                return
 
     def _get_collection_name(self, project_id: str, agent_id: str) -> str:
         """Generate collection name for a project-agent-embedding combination.
@@ -52,16 +202,33 @@ class MemoryStore:
         Returns:
             Collection name string
         """
-        # Sanitize IDs to be safe for collection names
-        safe_project = re.sub(r'[^a-zA-Z0-9_-]', '_', project_id)
-        safe_agent = re.sub(r'[^a-zA-Z0-9_-]', '_', agent_id)
+        key = (project_id, agent_id)
+        name = self._name_cache.get(key)
+        if name is not None:
+            return name
+        
+        # Sanitize IDs to be safe for collection names (most are already safe)
+        safe_project = project_id
+        if not _SAFE_CHARS.issuperset(project_id):
+            safe_project = _SANITIZE.sub('_', project_id)
+        safe_agent = agent_id
+        if not _SAFE_CHARS.issuperset(agent_id):
+            safe_agent = _SANITIZE.sub('_', agent_id)
         provider = self.embedding_provider.provider_name
         
-        return f"p_{safe_project}_a_{safe_agent}_emb_{provider}"
+        name = f"{self.collection_prefix}p_{safe_project}_a_{safe_agent}_emb_{provider}"
+        self._name_cache[key] = name
+        return name
 
     def _get_or_create_collection(self, project_id: str, agent_id: str):
         """Get or create a collection for the given project and agent.
         
+        The collection handle is cached, so ChromaDB is only asked once per
+        project and agent. Creation metadata (distance space, HNSW settings,
+        'normalized') is only passed for new collections: ChromaDB 0.5's
+        get_or_create_collection overwrites an existing collection's metadata,
+        which would relabel a legacy L2 collection as cosine.
+        
         Args:
             project_id: Project identifier
             agent_id: Agent identifier
@@ -69,6 +236,10 @@ class MemoryStore:
         Returns:
             ChromaDB collection
         """
+        collection = self._get_existing_collection(project_id, agent_id)
+        if collection is not None:
+            return collection
+        
         collection_name = self._get_collection_name(project_id, agent_id)
         
         metadata = {
@@ -77,15 +248,74 @@ class MemoryStore:
             "embedding_provider": self.embedding_provider.provider_name,
             "embedding_model": self.embedding_provider.model_name,
             "embedding_dimension": self.embedding_provider.dimension,
+            "hnsw:space": DISTANCE_SPACE,
+            **HNSW_PARAMS,
+            "normalized": True,
         }
         
         collection = self.client.get_or_create_collection(
             name=collection_name,
             metadata=metadata
         )
+        self._coll_cache[(project_id, agent_id)] = collection
+        
+        return collection
+
+    def _get_existing_collection(self, project_id: str, agent_id: str):
+        """Get the collection for the given project and agent if it exists.
+        
+        Unlike _get_or_create_collection this never creates a collection or
+        touches the embedding provider, so read-only operations don't load
+        the embedding model.
+        
+        Args:
+            project_id: Project identifier
+            agent_id: Agent identifier
+            
+        Returns:
+            ChromaDB collection, or None if nothing was stored yet
+        """
+        key = (project_id, agent_id)
+        collection = self._coll_cache.get(key)
+        if collection is not None:
+            return collection
+        
+        try:
+            collection = self.client.get_collection(
+                name=self._get_collection_name(project_id, agent_id)
+            )
+        except (ChromaError, ValueError):
+            # NotFoundError on ChromaDB 1.x, ValueError on older releases
+            return None
+        self._coll_cache[key] = collection
         
         return collection
 
+    def _distance_space(self, collection) -> str:
+        """Return the distance metric a collection was created with."""
+        return (collection.metadata or {}).get("hnsw:space", "l2")
+
+    def _unit_vectors(self, collection) -> bool:
+        """Whether every embedding in the collection was stored at unit length."""
+        return bool((collection.metadata or {}).get("normalized", False))
+
+    def _prepare_embeddings(self, collection, embeddings):
+        """Scale embeddings to unit length before storing them in a cosine collection.
+        
+        Cosine similarity then reduces to a dot product at query time. L2
+        collections keep raw embeddings, since scaling changes their distances.
+        
+        Args:
+            collection: ChromaDB collection the embeddings are written to
+            embeddings: Embedding vectors, one per row
+            
+        Returns:
+            Embeddings to store
+        """
+        if self._distance_space(collection) != "cosine":
+            return embeddings
+        return _normalize(np.asarray(embeddings, dtype=np.float32))
+
     def _serialize_metadata(self, metadata: Dict[str, Any]) -> str:
         """Serialize custom metadata to JSON string.
         
@@ -95,7 +325,8 @@ class MemoryStore:
         Returns:
             JSON string
         """
-        return json.dumps(metadata)
+        # ChromaDB metadata values must be str, so decode orjson's bytes
+        return orjson.dumps(metadata, option=orjson.OPT_NON_STR_KEYS).decode()
 
     def _deserialize_metadata(self, metadata_str: str) -> Dict[str, Any]:
         """Deserialize custom metadata from JSON string.
@@ -108,7 +339,102 @@ class MemoryStore:
         """
         if not metadata_str:
             return {}
-        return json.loads(metadata_str)
+        return orjson.loads(metadata_str)
+
+    def _get_index(self, collection) -> QuantizedIndex:
+        """Get the quantized index for a collection, building it on first use.
+        
+        Args:
+            collection: ChromaDB collection
+            
+        Returns:
+            QuantizedIndex holding every embedding in the collection
+        """
+        with self._index_lock:
+            index = self._indexes.get(collection.name)
+            if index is None:
+                result = collection.get(include=["embeddings"])
+                index = QuantizedIndex(self.quantization)
+                index.add(result['ids'], result['embeddings'])
+                self._indexes[collection.name] = index
+            return index
+
+    def _index_add(self, collection, ids: List[str], embeddings) -> None:
+        """Mirror added or re-embedded vectors into a loaded quantized index."""
+        with self._index_lock:
+            index = self._indexes.get(collection.name)
+            if index is not None:
+                index.add(ids, embeddings)
+
+    def _index_remove(self, collection, ids: List[str]) -> None:
+        """Mirror deleted vectors into a loaded quantized index."""
+        with self._index_lock:
+            index = self._indexes.get(collection.name)
+            if index is not None:
+                index.remove(ids)
+
+    def _query_quantized(
+        self,
+        collection,
+        query_embedding: List[float],
+        limit: int
+    ) -> Dict[str, Any]:
+        """Search a collection through its quantized index.
+        
+        The index shortlists RERANK_FACTOR * limit candidates, which are then
+        reranked by exact distance against the full-precision embeddings
+        stored in ChromaDB, using the collection's distance metric. An
+        unquantized ('fp32') index already scores cosine collections exactly,
+        so only the top ``limit`` rows are fetched, without embeddings.
+        
+        Args:
+            collection: ChromaDB collection
+            query_embedding: Query embedding
+            limit: Maximum number of results
+            
+        Returns:
+            Results shaped like ChromaDB's collection.query() output
+        """
+        cosine = self._distance_space(collection) == "cosine"
+        with self._index_lock:
+            index = self._get_index(collection)
+            exact = index.exact and cosine
+            candidates, scores = index.search_with_scores(
+                query_embedding, limit if exact else limit * RERANK_FACTOR
+            )
+        if not candidates:
+            return {'ids': [[]], 'documents': [[]], 'metadatas': [[]], 'distances': [[]]}
+        
+        include = ["documents", "metadatas"]
+        if not exact:
+            include.append("embeddings")
+        result = collection.get(ids=candidates, include=include)
+        
+        if exact:
+            # ChromaDB returns rows in storage order, so map scores back by ID
+            score_by_id = dict(zip(candidates, scores.tolist()))
+            distances = 1.0 - np.array([score_by_id[i] for i in result['ids']])
+        else:
+            # Match the distances ChromaDB itself reports for the collection
+            query = np.asarray(query_embedding, dtype=np.float32)
+            vectors = np.asarray(result['embeddings'], dtype=np.float32)
+            if cosine and self._unit_vectors(collection):
+                # Stored vectors are unit length, so only the query needs scaling
+                distances = 1.0 - vectors @ (query / (np.linalg.norm(query) or 1.0))
+            elif cosine:
+                norms = np.linalg.norm(vectors, axis=1) * np.linalg.norm(query)
+                norms[norms == 0] = 1.0
+                distances = 1.0 - (vectors @ query) / norms
+            else:
+                distances = ((vectors - query) ** 2).sum(axis=1)
+        order = np.argsort(distances, kind="stable")[:limit]
+        
+        return {
+            'ids': [[result['ids'][i] for i in order]],
+            'documents': [[result['documents'][i] for i in order]],
+            'metadatas': [[result['metadatas'][i] for i in order]],
+            'distances': [[float(distances[i]) for i in order]],
+        }
 
     def store_memory(self, memory_create: MemoryCreate) -> Memory:
         """Store a new memory.
@@ -119,36 +445,57 @@ class MemoryStore:
         Returns:
             Created Memory object
         """
+        if self._writer is not None:
+            # Hand the memory to the background writer; it is persisted later
+            now = datetime.now()
+            memory = Memory(
+                memory_id=uuid.uuid4().hex,
+                project_id=memory_create.project_id,
+                agent_id=memory_create.agent_id,
+                content=memory_create.content,
+                metadata=memory_create.metadata,
+                embedding_provider=self.embedding_provider.provider_name,
+                embedding_model=self.embedding_provider.model_name,
+                created_at=now,
+                updated_at=now
+            )
+            self._queue.put(memory)
+            return memory
+        
         collection = self._get_or_create_collection(
             memory_create.project_id,
             memory_create.agent_id
         )
         
         # Generate unique ID
-        memory_id = str(uuid.uuid4())
+        memory_id = uuid.uuid4().hex
         
         # Generate embedding
-        embedding = self.embedding_provider.embed(memory_create.content)
+        embeddings = self._prepare_embeddings(
+            collection, [self.embedding_provider.embed(memory_create.content)]
+        )
         
         # Prepare metadata for ChromaDB
         now = datetime.now()
+        now_iso = now.isoformat()
         chroma_metadata = {
             "project_id": memory_create.project_id,
             "agent_id": memory_create.agent_id,
             "custom_metadata": self._serialize_metadata(memory_create.metadata),
             "embedding_provider": self.embedding_provider.provider_name,
             "embedding_model": self.embedding_provider.model_name,
-            "created_at": now.isoformat(),
-            "updated_at": now.isoformat(),
+            "created_at": now_iso,
+            "updated_at": now_iso,
         }
         
         # Store in ChromaDB
         collection.add(
             ids=[memory_id],
-            embeddings=[embedding],
+            embeddings=embeddings,
             documents=[memory_create.content],
             metadatas=[chroma_metadata]
         )
+        self._index_add(collection, [memory_id], embeddings)
         
         # Return Memory object
         return Memory(
@@ -163,6 +510,93 @@ class MemoryStore:
             updated_at=now
         )
 
+    def store_memories(
+        self,
+        creates: List[MemoryCreate],
+        embeddings: Optional[Any] = None
+    ) -> List[Memory]:
+        """Store several memories at once.
+        
+        Requests are grouped by project and agent so that each collection
+        gets a single batched embedding call and a single ChromaDB add.
+        
+        Args:
+            creates: Memory creation requests
+            embeddings: Precomputed embeddings, one row per request, from the
+                store's embedding model; the provider is not called if given
+            
+        Returns:
+            Created Memory objects, in the same order as ``creates``
+        """
+        provider_name = self.embedding_provider.provider_name
+        model_name = self.embedding_provider.model_name
+        now = datetime.now()
+        
+        memories = [
+            Memory(
+                memory_id=uuid.uuid4().hex,
+                project_id=create.project_id,
+                agent_id=create.agent_id,
+                content=create.content,
+                metadata=create.metadata,
+                embedding_provider=provider_name,
+                embedding_model=model_name,
+                created_at=now,
+                updated_at=now
+            )
+            for create in creates
+        ]
+        self._add_memories(memories, embeddings)
+        
+        return memories
+
+    def _add_memories(self, memories: List[Memory], embeddings: Optional[Any] = None) -> None:
+        """Embed and add prepared memories, one batch per collection.
+        
+        Args:
+            memories: Memories with their IDs and timestamps already assigned
+            embeddings: Precomputed embeddings, one row per memory (default: embed contents)
+        """
+        # Bucket memory positions by target collection
+        buckets: Dict[Tuple[str, str], List[int]] = defaultdict(list)
+        for position, memory in enumerate(memories):
+            buckets[(memory.project_id, memory.agent_id)].append(position)
+        
+        for (project_id, agent_id), positions in buckets.items():
+            collection = self._get_or_create_collection(project_id, agent_id)
+            bucket = [memories[position] for position in positions]
+            
+            # One embedding call for the whole bucket
+            contents = [memory.content for memory in bucket]
+            if embeddings is None:
+                vectors = self.embedding_provider.embed_batch(contents)
+            else:
+                vectors = np.asarray(embeddings, dtype=np.float32)[positions]
+            vectors = self._prepare_embeddings(collection, vectors)
+            
+            ids = [memory.memory_id for memory in bucket]
+            metadatas = []
+            for memory in bucket:
+                created_iso = memory.created_at.isoformat()
+                metadatas.append({
+                    "project_id": project_id,
+                    "agent_id": agent_id,
+                    "custom_metadata": self._serialize_metadata(memory.metadata),
+                    "embedding_provider": memory.embedding_provider,
+                    "embedding_model": memory.embedding_model,
+                    "created_at": created_iso,
+                    "updated_at": created_iso,
+                })
+            
+            # One ChromaDB round-trip for the whole bucket
+            collection.add(
+                ids=ids,
+                embeddings=vectors,
+                documents=contents,
+                metadatas=metadatas
+            )
+            self._index_add(collection, ids, vectors)
+
     def get_memory(
         self,
         project_id: str,
@@ -179,7 +613,9 @@ class MemoryStore:
         Returns:
             Memory object or None if not found
         """
-        collection = self._get_or_create_collection(project_id, agent_id)
+        collection = self._get_existing_collection(project_id, agent_id)
+        if collection is None:
+            return None
         
         result = collection.get(
             ids=[memory_id],
@@ -198,8 +634,8 @@ class MemoryStore:
             metadata=self._deserialize_metadata(metadata.get('custom_metadata', '{}')),
             embedding_provider=metadata['embedding_provider'],
             embedding_model=metadata['embedding_model'],
-            created_at=datetime.fromisoformat(metadata['created_at']),
-            updated_at=datetime.fromisoformat(metadata['updated_at'])
+            created_at=_parse_time(metadata['created_at']),
+            updated_at=_parse_time(metadata['updated_at'])
         )
 
     def search_memories(
@@ -225,7 +661,7 @@ class MemoryStore:
         collection = self._get_or_create_collection(project_id, agent_id)
         
         # Generate query embedding
-        query_embedding = self.embedding_provider.embed(query)
+        query_embedding = self._query_cache.get(query, self.embedding_provider.embed)
         
         # Prepare where clause for filters
         where = None
@@ -234,40 +670,55 @@ class MemoryStore:
             # This is a simplified implementation
             where = filters
         
-        # Query ChromaDB
-        results = collection.query(
-            query_embeddings=[query_embedding],
-            n_results=limit,
-            where=where,
-            include=["documents", "metadatas", "distances"]
-        )
+        if self.quantization != "none" and where is None:
+            # Shortlist with the quantized index, rerank at full precision
+            results = self._query_quantized(collection, query_embedding, limit)
+        else:
+            # Query ChromaDB
+            results = collection.query(
+                query_embeddings=[query_embedding],
+                n_results=limit,
+                where=where,
+                include=["documents", "metadatas", "distances"]
+            )
         
         # Convert to SearchResult objects
         search_results = []
         if results['ids'][0]:
-            for i, memory_id in enumerate(results['ids'][0]):
-                metadata = results['metadatas'][0][i]
-                distance = results['distances'][0][i]
-                
-                # Convert distance to similarity score (1 - normalized distance)
-                # ChromaDB uses L2 distance, we convert to 0-1 similarity
-                similarity = 1.0 / (1.0 + distance)
-                
-                memory = Memory(
+            # Convert distances to 0-1 similarity scores in one pass
+            distances = np.asarray(results['distances'][0], dtype=np.float64)
+            if self._distance_space(collection) == "cosine":
+                similarities = np.clip(1.0 - distances, 0.0, 1.0).tolist()
+            else:
+                # Collections created before the switch to cosine use L2
+                similarities = np.minimum(1.0 / (1.0 + distances), 1.0).tolist()
+            
+            # Rows come from our own store, so skip pydantic validation
+            construct_memory = Memory.model_construct
+            construct_result = SearchResult.model_construct
+            deserialize = self._deserialize_metadata
+            parse_time = _parse_time
+            
+            for memory_id, content, metadata, similarity in zip(
+                results['ids'][0],
+                results['documents'][0],
+                results['metadatas'][0],
+                similarities
+            ):
+                memory = construct_memory(
                     memory_id=memory_id,
                     project_id=metadata['project_id'],
                     agent_id=metadata['agent_id'],
-                    content=results['documents'][0][i],
-                    metadata=self._deserialize_metadata(metadata.get('custom_metadata', '{}')),
+                    content=content,
+                    metadata=deserialize(metadata.get('custom_metadata', '{}')),
                     embedding_provider=metadata['embedding_provider'],
                     embedding_model=metadata['embedding_model'],
-                    created_at=datetime.fromisoformat(metadata['created_at']),
-                    updated_at=datetime.fromisoformat(metadata['updated_at'])
+                    created_at=parse_time(metadata['created_at']),
+                    updated_at=parse_time(metadata['updated_at'])
                 )
-                
-                search_results.append(SearchResult(
+                search_results.append(construct_result(
                     memory=memory,
-                    similarity_score=min(similarity, 1.0)  # Cap at 1.0
+                    similarity_score=similarity
                 ))
         
         return search_results
@@ -295,7 +746,7 @@ class MemoryStore:
         if not existing:
             return None
         
-        collection = self._get_or_create_collection(project_id, agent_id)
+        collection = self._get_existing_collection(project_id, agent_id)
         
         # Determine what to update
         new_content = update.content if update.content is not None else existing.content
@@ -313,15 +764,18 @@ class MemoryStore:
             "updated_at": now.isoformat(),
         }
         
-        # If content changed, re-embed
-        if update.content is not None:
-            new_embedding = self.embedding_provider.embed(new_content)
+        # Only re-embed if the content actually changed
+        if new_content != existing.content:
+            new_embeddings = self._prepare_embeddings(
+                collection, [self.embedding_provider.embed(new_content)]
+            )
             collection.update(
                 ids=[memory_id],
-                embeddings=[new_embedding],
+                embeddings=new_embeddings,
                 documents=[new_content],
                 metadatas=[chroma_metadata]
             )
+            self._index_add(collection, [memory_id], new_embeddings)
         else:
             # Only metadata changed, no need to re-embed
             collection.update(
@@ -358,10 +812,13 @@ class MemoryStore:
         Returns:
             True if deleted, False otherwise
         """
-        collection = self._get_or_create_collection(project_id, agent_id)
+        collection = self._get_existing_collection(project_id, agent_id)
+        if collection is None:
+            return False
         
         try:
             collection.delete(ids=[memory_id])
+            self._index_remove(collection, [memory_id])
             return True
         except Exception:
             return False
@@ -386,7 +843,9 @@ class MemoryStore:
         Returns:
             List of MemoryMetadata objects
         """
-        collection = self._get_or_create_collection(project_id, agent_id)
+        collection = self._get_existing_collection(project_id, agent_id)
+        if collection is None:
+            return []
         
         # Get all IDs and metadatas
         # ChromaDB doesn't have native pagination, so we handle it here
@@ -398,20 +857,37 @@ class MemoryStore:
         ids = result['ids'][offset:offset + limit]
         metadatas_list = result['metadatas'][offset:offset + limit]
         
-        # Convert to MemoryMetadata objects
-        memory_metadatas = []
-        for i, memory_id in enumerate(ids):
-            metadata = metadatas_list[i]
-            memory_metadatas.append(MemoryMetadata(
+        # Convert to MemoryMetadata objects, skipping validation of our own rows
+        construct = MemoryMetadata.model_construct
+        deserialize = self._deserialize_metadata
+        parse_time = _parse_time
+        memory_metadatas = [
+            construct(
                 memory_id=memory_id,
                 project_id=metadata['project_id'],
                 agent_id=metadata['agent_id'],
-                metadata=self._deserialize_metadata(metadata.get('custom_metadata', '{}')),
+                metadata=deserialize(metadata.get('custom_metadata', '{}')),
                 embedding_provider=metadata['embedding_provider'],
                 embedding_model=metadata['embedding_model'],
-                created_at=datetime.fromisoformat(metadata['created_at']),
-                updated_at=datetime.fromisoformat(metadata['updated_at'])
-            ))
+                created_at=parse_time(metadata['created_at']),
+                updated_at=parse_time(metadata['updated_at'])
+            )
+            for memory_id, metadata in zip(ids, metadatas_list)
+        ]
         
         return memory_metadatas
 
+    def count_memories(self, project_id: str, agent_id: str) -> int:
+        """Count an agent's memories without fetching them.
+        
+        Args:
+            project_id: Project identifier
+            agent_id: Agent identifier
+            
+        Returns:
+            Number of stored memories
+        """
+        collection = self._get_existing_collection(project_id, agent_id)
+        if collection is None:
+            return 0
+        return collection.count()
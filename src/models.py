@@ -58,8 +58,11 @@ class Memory(BaseModel):
 class MemoryMetadata(BaseModel):
     """Memory metadata without content (for list operations)."""
     
+    # The store only builds these with model_construct, so the validator is
+    # compiled on first validation or serialization instead of at import
     model_config = ConfigDict(
-        json_encoders={datetime: lambda v: v.isoformat()}
+        json_encoders={datetime: lambda v: v.isoformat()},
+        defer_build=True
     )
     
     memory_id: str = Field(..., description="Unique memory identifier")
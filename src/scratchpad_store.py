@@ -1,15 +1,31 @@
 """Scratchpad store implementation using JSON files."""
 
 import os
-import json
 import re
+import tempfile
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, List
+from typing import Any, Dict, Optional, List, Tuple
 from datetime import datetime
 
+import orjson
+
 from src.models import Scratchpad, ScratchpadCreate, ScratchpadUpdate
 
 
+# Characters not allowed in scratchpad filenames
+_SANITIZE = re.compile(r'[^\w\-.]')
+
+# Name of the file listing every scratchpad; scratchpad files always contain '_'
+INDEX_FILENAME = "index.json"
+
+# Fields every index entry needs
+_INDEX_KEYS = frozenset({"project_id", "agent_id", "filename"})
+
+# Timestamps repeat across scratchpads (created_at == updated_at until edited)
+_parse_time = lru_cache(maxsize=1024)(datetime.fromisoformat)
+
+
 class ScratchpadStore:
     """Store for agent scratchpads using simple JSON file storage."""
 
@@ -24,6 +40,86 @@ class ScratchpadStore:
         
         self.data_path = Path(data_path)
         self.data_path.mkdir(parents=True, exist_ok=True)
+        
+        # Index entries by (project_id, agent_id), mirrored to index.json
+        self._index: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._load_index()
+
+    def _write_atomic(self, filepath: Path, payload: bytes) -> None:
+        """Write a file via a temporary file, so readers never see a partial file.
+        
+        The temporary file gets a unique name in the same directory, so
+        processes sharing the directory never write to each other's file.
+        """
+        with tempfile.NamedTemporaryFile(
+            dir=self.data_path, prefix=filepath.name + ".", suffix=".tmp", delete=False
+        ) as f:
+            f.write(payload)
+        try:
+            os.replace(f.name, filepath)
+        except OSError:
+            os.unlink(f.name)
+            raise
+
+    def _load_index(self) -> None:
+        """Load the scratchpad index; a missing or unreadable one starts empty."""
+        try:
+            with open(self.data_path / INDEX_FILENAME, 'rb') as f:
+                entries = orjson.loads(f.read())
+            # Entries without a filename can't be reconciled; _sync_index
+            # re-adds their scratchpads from the files
+            self._index = {
+                (e["project_id"], e["agent_id"]): e for e in entries
+                if isinstance(e, dict) and _INDEX_KEYS <= e.keys()
+            }
+        except (OSError, orjson.JSONDecodeError, KeyError, TypeError):
+            # e.g. data from an older version; _sync_index fills it from the files
+            self._index = {}
+
+    def _sync_index(self) -> None:
+        """Reconcile the index with the scratchpad files on disk.
+        
+        Every server process sharing the directory writes its own copy of
+        index.json, so entries saved or deleted by another process can be
+        missing here. Only files the index does not know about are parsed.
+        """
+        filenames = {
+            name for name in os.listdir(self.data_path)
+            if name.endswith(".json") and name != INDEX_FILENAME
+        }
+        
+        stale = [
+            key for key, entry in self._index.items()
+            if entry["filename"] not in filenames
+        ]
+        for key in stale:
+            del self._index[key]
+        
+        indexed = {entry["filename"] for entry in self._index.values()}
+        added = False
+        for name in filenames - indexed:
+            scratchpad = self._load_scratchpad(self.data_path / name)
+            if scratchpad is not None:
+                self._index_scratchpad(scratchpad, self.data_path / name)
+                added = True
+        
+        if stale or added:
+            self._flush_index()
+
+    def _flush_index(self) -> None:
+        """Write the in-memory index to index.json."""
+        payload = orjson.dumps(list(self._index.values()))
+        self._write_atomic(self.data_path / INDEX_FILENAME, payload)
+
+    def _index_scratchpad(self, scratchpad: Scratchpad, filepath: Path) -> None:
+        """Add or replace the index entry for a scratchpad."""
+        self._index[(scratchpad.project_id, scratchpad.agent_id)] = {
+            "project_id": scratchpad.project_id,
+            "agent_id": scratchpad.agent_id,
+            "filename": filepath.name,
+            "created_at": scratchpad.created_at.isoformat(),
+            "updated_at": scratchpad.updated_at.isoformat(),
+        }
 
     def _sanitize_id(self, id_string: str) -> str:
         """Sanitize ID string to be safe for filenames.
@@ -35,7 +131,7 @@ class ScratchpadStore:
             Sanitized ID string
         """
         # Replace unsafe characters with underscores
-        return re.sub(r'[^\w\-.]', '_', id_string)
+        return _SANITIZE.sub('_', id_string)
 
     def _get_filepath(self, project_id: str, agent_id: str) -> Path:
         """Get filepath for a scratchpad.
@@ -66,8 +162,10 @@ class ScratchpadStore:
             "created_at": scratchpad.created_at.isoformat(),
             "updated_at": scratchpad.updated_at.isoformat()
         }
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        self._write_atomic(filepath, orjson.dumps(data, option=orjson.OPT_INDENT_2))
+        
+        self._index_scratchpad(scratchpad, filepath)
+        self._flush_index()
 
     def _load_scratchpad(self, filepath: Path) -> Optional[Scratchpad]:
         """Load scratchpad from disk.
@@ -82,17 +180,18 @@ class ScratchpadStore:
             return None
         
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            with open(filepath, 'rb') as f:
+                data = orjson.loads(f.read())
             
-            return Scratchpad(
+            # Files are written by _save_scratchpad, so skip pydantic validation
+            return Scratchpad.model_construct(
                 project_id=data["project_id"],
                 agent_id=data["agent_id"],
                 content=data["content"],
-                created_at=datetime.fromisoformat(data["created_at"]),
-                updated_at=datetime.fromisoformat(data["updated_at"])
+                created_at=_parse_time(data["created_at"]),
+                updated_at=_parse_time(data["updated_at"])
             )
-        except (json.JSONDecodeError, KeyError, ValueError):
+        except (orjson.JSONDecodeError, KeyError, TypeError, ValueError):
             return None
 
     def create_scratchpad(self, create: ScratchpadCreate) -> Optional[Scratchpad]:
@@ -193,9 +292,12 @@ class ScratchpadStore:
         
         try:
             filepath.unlink()
-            return True
         except OSError:
             return False
+        
+        if self._index.pop((project_id, agent_id), None) is not None:
+            self._flush_index()
+        return True
 
     def list_scratchpads(
         self,
@@ -212,17 +314,17 @@ class ScratchpadStore:
             List of Scratchpad objects
         """
         scratchpads = []
+        self._sync_index()
         
-        # Load all scratchpad files
-        for filepath in self.data_path.glob("*.json"):
-            scratchpad = self._load_scratchpad(filepath)
-            if scratchpad is None:
+        # Filter on the index, then load only the matching files
+        for (entry_project, entry_agent), entry in list(self._index.items()):
+            if project_id and entry_project != project_id:
                 continue
-            
-            # Apply filters
-            if project_id and scratchpad.project_id != project_id:
+            if agent_id and entry_agent != agent_id:
                 continue
-            if agent_id and scratchpad.agent_id != agent_id:
+            
+            scratchpad = self._load_scratchpad(self.data_path / entry["filename"])
+            if scratchpad is None:
                 continue
             
             scratchpads.append(scratchpad)
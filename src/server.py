@@ -2,8 +2,11 @@
 
 import asyncio
 import logging
-from typing import Any, Dict, List, Optional
+from collections import defaultdict
+from types import MappingProxyType
+from typing import Any, Awaitable, Callable, Dict, List, Mapping, Optional, Tuple, Union
 
+import orjson
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import Tool, TextContent
@@ -11,7 +14,7 @@ from mcp.types import Tool, TextContent
 from src.memory_store import MemoryStore
 from src.scratchpad_store import ScratchpadStore
 from src.embeddings import get_embedding_provider
-from src.models import MemoryCreate, MemoryUpdate, ScratchpadCreate, ScratchpadUpdate
+from src.models import Memory, MemoryCreate, MemoryUpdate, ScratchpadCreate, ScratchpadUpdate
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -25,352 +28,871 @@ app = Server("memalpha")
 memory_store: Optional[MemoryStore] = None
 scratchpad_store: Optional[ScratchpadStore] = None
 
+# Store initialization, started by main() and awaited by the first tool calls
+_stores_ready: Optional["asyncio.Future[None]"] = None
 
-def get_memory_suggestions() -> Dict[str, Any]:
+# Shared default for omitted metadata; models copy it into their own dict
+_EMPTY_METADATA: Mapping[str, Any] = MappingProxyType({})
+
+# Seconds store_memory calls wait so concurrent ones share one batched write
+STORE_BATCH_WINDOW = 0.005
+
+# store_memory calls waiting for the current batch window to close
+_pending_stores: List[Tuple[MemoryCreate, "asyncio.Future[Memory]"]] = []
+
+
+def _metadata_json(metadata: Dict[str, Any]) -> str:
+    """Render custom metadata as compact JSON for tool responses."""
+    return orjson.dumps(metadata).decode()
+
+
+def _metadata_summary(metadata: Dict[str, Any]) -> str:
+    """Summarize custom metadata as its category and tag count."""
+    parts = []
+    category = metadata.get("category")
+    if category is not None:
+        parts.append(f"category: {category}")
+    tags = metadata.get("tags")
+    if isinstance(tags, list):
+        parts.append(f"{len(tags)} tag{'' if len(tags) == 1 else 's'}")
+    return ", ".join(parts) if parts else "-"
+
+
+# Static suggestions, built once; read-only so callers can't change them
+_SUGGESTIONS: Mapping[str, Any] = MappingProxyType({
+    "suggested_categories": [
+        "fact",          # Factual information about the project
+        "procedure",     # How to do something
+        "preference",    # User/team preferences
+        "context",       # Project context and background
+        "decision",      # Important decisions made
+        "issue",         # Problems and their solutions
+    ],
+    "metadata_fields": {
+        "tags": "List of tags for categorization (e.g., ['backend', 'api'])",
+        "category": "One of the suggested categories above",
+        "importance": "Integer 0-10 indicating importance",
+        "source": "Where this information came from",
+        "related_to": "IDs of related memories",
+    },
+    "examples": [
+        {
+            "content": "User prefers TypeScript over JavaScript for type safety",
+            "metadata": {
+                "category": "preference",
+                "tags": ["language", "typescript"],
+                "importance": 8
+            }
+        },
+        {
+            "content": "Authentication implemented using JWT with 7-day expiry",
+            "metadata": {
+                "category": "fact",
+                "tags": ["security", "auth", "jwt"],
+                "importance": 9
+            }
+        },
+        {
+            "content": "To deploy: run 'yarn build' then 'yarn deploy:prod'",
+            "metadata": {
+                "category": "procedure",
+                "tags": ["deployment", "commands"],
+                "importance": 7
+            }
+        }
+    ],
+    "best_practices": [
+        "Store specific, actionable information",
+        "Use consistent tagging across related memories",
+        "Mark important decisions with high importance scores",
+        "Include context in the content, not just facts",
+        "Update memories when information changes rather than creating duplicates",
+        "Use descriptive content that will match semantic searches"
+    ]
+})
+
+
+def _format_suggestions(suggestions: Mapping[str, Any]) -> str:
+    """Render memory suggestions as the get_memory_suggestions tool response.
+    
+    Args:
+        suggestions: Suggestions as returned by get_memory_suggestions()
+        
+    Returns:
+        Human-readable suggestions text
+    """
+    response = "Memory Structure Suggestions\n" + "="*50 + "\n\n"
+    
+    response += "Suggested Categories:\n"
+    for cat in suggestions["suggested_categories"]:
+        response += f"  - {cat}\n"
+    
+    response += "\nRecommended Metadata Fields:\n"
+    for field, desc in suggestions["metadata_fields"].items():
+        response += f"  - {field}: {desc}\n"
+    
+    response += "\nExamples:\n"
+    for i, example in enumerate(suggestions["examples"], 1):
+        response += f"\n{i}. Content: {example['content']}\n"
+        response += f"   Metadata: {_metadata_json(example['metadata'])}\n"
+    
+    response += "\nBest Practices:\n"
+    for tip in suggestions["best_practices"]:
+        response += f"  - {tip}\n"
+    
+    return response
+
+
+_SUGGESTIONS_TEXT = _format_suggestions(_SUGGESTIONS)
+
+
+def get_memory_suggestions() -> Mapping[str, Any]:
     """Get suggestions for memory structure and best practices.
     
     Returns:
-        Dictionary with suggestions and examples
+        Read-only mapping with suggestions and examples
     """
-    return {
-        "suggested_categories": [
-            "fact",          # Factual information about the project
-            "procedure",     # How to do something
-            "preference",    # User/team preferences
-            "context",       # Project context and background
-            "decision",      # Important decisions made
-            "issue",         # Problems and their solutions
-        ],
-        "metadata_fields": {
-            "tags": "List of tags for categorization (e.g., ['backend', 'api'])",
-            "category": "One of the suggested categories above",
-            "importance": "Integer 0-10 indicating importance",
-            "source": "Where this information came from",
-            "related_to": "IDs of related memories",
-        },
-        "examples": [
-            {
-                "content": "User prefers TypeScript over JavaScript for type safety",
+    return _SUGGESTIONS
+
+
+# Tool definitions are static, so build them once rather than per list_tools call
+_TOOLS: List[Tool] = [
+    Tool(
+        name="store_memory",
+        description=(
+            "Store a new memory for an agent in a project. "
+            "Memories are automatically embedded for semantic search."
+        ),
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "project_id": {
+                    "type": "string",
+                    "description": "Project identifier (required)"
+                },
+                "agent_id": {
+                    "type": "string",
+                    "description": "Agent identifier (required)"
+                },
+                "content": {
+                    "type": "string",
+                    "description": "Memory content - be specific and descriptive (required)"
+                },
                 "metadata": {
-                    "category": "preference",
-                    "tags": ["language", "typescript"],
-                    "importance": 8
+                    "type": "object",
+                    "description": "Optional custom metadata (tags, category, importance, etc.)",
+                    "default": {}
                 }
             },
-            {
-                "content": "Authentication implemented using JWT with 7-day expiry",
-                "metadata": {
-                    "category": "fact",
-                    "tags": ["security", "auth", "jwt"],
-                    "importance": 9
+            "required": ["project_id", "agent_id", "content"]
+        }
+    ),
+    Tool(
+        name="store_memories",
+        description=(
+            "Store several memories for an agent in a project at once. "
+            "Faster than repeated store_memory calls when saving many memories."
+        ),
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "project_id": {
+                    "type": "string",
+                    "description": "Project identifier (required)"
+                },
+                "agent_id": {
+                    "type": "string",
+                    "description": "Agent identifier (required)"
+                },
+                "memories": {
+                    "type": "array",
+                    "description": "Memories to store (required)",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "content": {
+                                "type": "string",
+                                "description": "Memory content - be specific and descriptive"
+                            },
+                            "metadata": {
+                                "type": "object",
+                                "description": "Optional custom metadata",
+                                "default": {}
+                            }
+                        },
+                        "required": ["content"]
+                    }
                 }
             },
-            {
-                "content": "To deploy: run 'yarn build' then 'yarn deploy:prod'",
-                "metadata": {
-                    "category": "procedure",
-                    "tags": ["deployment", "commands"],
-                    "importance": 7
+            "required": ["project_id", "agent_id", "memories"]
+        }
+    ),
+    Tool(
+        name="search_memories",
+        description=(
+            "Search for memories using semantic similarity. "
+            "Returns memories ranked by relevance to the query."
+        ),
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "project_id": {
+                    "type": "string",
+                    "description": "Project identifier (required)"
+                },
+                "agent_id": {
+                    "type": "string",
+                    "description": "Agent identifier (required)"
+                },
+                "query": {
+                    "type": "string",
+                    "description": "Search query (required)"
+                },
+                "limit": {
+                    "type": "integer",
+                    "description": "Maximum number of results (default: 10)",
+                    "default": 10
+                },
+                "filters": {
+                    "type": "object",
+                    "description": "Optional metadata filters",
+                    "default": {}
                 }
-            }
-        ],
-        "best_practices": [
-            "Store specific, actionable information",
-            "Use consistent tagging across related memories",
-            "Mark important decisions with high importance scores",
-            "Include context in the content, not just facts",
-            "Update memories when information changes rather than creating duplicates",
-            "Use descriptive content that will match semantic searches"
-        ]
-    }
-
-
-@app.list_tools()
-async def list_tools() -> List[Tool]:
-    """List available MCP tools."""
-    return [
-        Tool(
-            name="store_memory",
-            description=(
-                "Store a new memory for an agent in a project. "
-                "Memories are automatically embedded for semantic search."
-            ),
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "project_id": {
-                        "type": "string",
-                        "description": "Project identifier (required)"
-                    },
-                    "agent_id": {
-                        "type": "string",
-                        "description": "Agent identifier (required)"
-                    },
-                    "content": {
-                        "type": "string",
-                        "description": "Memory content - be specific and descriptive (required)"
-                    },
-                    "metadata": {
-                        "type": "object",
-                        "description": "Optional custom metadata (tags, category, importance, etc.)",
-                        "default": {}
-                    }
+            },
+            "required": ["project_id", "agent_id", "query"]
+        }
+    ),
+    Tool(
+        name="get_memory",
+        description="Retrieve a specific memory by its ID.",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "project_id": {
+                    "type": "string",
+                    "description": "Project identifier (required)"
                 },
-                "required": ["project_id", "agent_id", "content"]
-            }
-        ),
-        Tool(
-            name="search_memories",
-            description=(
-                "Search for memories using semantic similarity. "
-                "Returns memories ranked by relevance to the query."
-            ),
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "project_id": {
-                        "type": "string",
-                        "description": "Project identifier (required)"
-                    },
-                    "agent_id": {
-                        "type": "string",
-                        "description": "Agent identifier (required)"
-                    },
-                    "query": {
-                        "type": "string",
-                        "description": "Search query (required)"
-                    },
-                    "limit": {
-                        "type": "integer",
-                        "description": "Maximum number of results (default: 10)",
-                        "default": 10
-                    },
-                    "filters": {
-                        "type": "object",
-                        "description": "Optional metadata filters",
-                        "default": {}
-                    }
+                "agent_id": {
+                    "type": "string",
+                    "description": "Agent identifier (required)"
                 },
-                "required": ["project_id", "agent_id", "query"]
-            }
+                "memory_id": {
+                    "type": "string",
+                    "description": "Memory identifier (required)"
+                }
+            },
+            "required": ["project_id", "agent_id", "memory_id"]
+        }
+    ),
+    Tool(
+        name="update_memory",
+        description=(
+            "Update an existing memory's content and/or metadata. "
+            "If content is updated, the embedding is automatically regenerated."
         ),
-        Tool(
-            name="get_memory",
-            description="Retrieve a specific memory by its ID.",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "project_id": {
-                        "type": "string",
-                        "description": "Project identifier (required)"
-                    },
-                    "agent_id": {
-                        "type": "string",
-                        "description": "Agent identifier (required)"
-                    },
-                    "memory_id": {
-                        "type": "string",
-                        "description": "Memory identifier (required)"
-                    }
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "project_id": {
+                    "type": "string",
+                    "description": "Project identifier (required)"
                 },
-                "required": ["project_id", "agent_id", "memory_id"]
-            }
-        ),
-        Tool(
-            name="update_memory",
-            description=(
-                "Update an existing memory's content and/or metadata. "
-                "If content is updated, the embedding is automatically regenerated."
-            ),
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "project_id": {
-                        "type": "string",
-                        "description": "Project identifier (required)"
-                    },
-                    "agent_id": {
-                        "type": "string",
-                        "description": "Agent identifier (required)"
-                    },
-                    "memory_id": {
-                        "type": "string",
-                        "description": "Memory identifier (required)"
-                    },
-                    "content": {
-                        "type": "string",
-                        "description": "Updated content (optional)"
-                    },
-                    "metadata": {
-                        "type": "object",
-                        "description": "Updated metadata (optional)"
-                    }
+                "agent_id": {
+                    "type": "string",
+                    "description": "Agent identifier (required)"
                 },
-                "required": ["project_id", "agent_id", "memory_id"]
-            }
-        ),
-        Tool(
-            name="delete_memory",
-            description="Delete a memory permanently.",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "project_id": {
-                        "type": "string",
-                        "description": "Project identifier (required)"
-                    },
-                    "agent_id": {
-                        "type": "string",
-                        "description": "Agent identifier (required)"
-                    },
-                    "memory_id": {
-                        "type": "string",
-                        "description": "Memory identifier (required)"
-                    }
+                "memory_id": {
+                    "type": "string",
+                    "description": "Memory identifier (required)"
                 },
-                "required": ["project_id", "agent_id", "memory_id"]
-            }
+                "content": {
+                    "type": "string",
+                    "description": "Updated content (optional)"
+                },
+                "metadata": {
+                    "type": "object",
+                    "description": "Updated metadata (optional)"
+                }
+            },
+            "required": ["project_id", "agent_id", "memory_id"]
+        }
+    ),
+    Tool(
+        name="delete_memory",
+        description="Delete a memory permanently.",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "project_id": {
+                    "type": "string",
+                    "description": "Project identifier (required)"
+                },
+                "agent_id": {
+                    "type": "string",
+                    "description": "Agent identifier (required)"
+                },
+                "memory_id": {
+                    "type": "string",
+                    "description": "Memory identifier (required)"
+                }
+            },
+            "required": ["project_id", "agent_id", "memory_id"]
+        }
+    ),
+    Tool(
+        name="list_memories",
+        description=(
+            "List memories (metadata only, without full content) with pagination. "
+            "Useful for browsing available memories."
         ),
-        Tool(
-            name="list_memories",
-            description=(
-                "List memories (metadata only, without full content) with pagination. "
-                "Useful for browsing available memories."
-            ),
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "project_id": {
-                        "type": "string",
-                        "description": "Project identifier (required)"
-                    },
-                    "agent_id": {
-                        "type": "string",
-                        "description": "Agent identifier (required)"
-                    },
-                    "limit": {
-                        "type": "integer",
-                        "description": "Maximum number of results (default: 100)",
-                        "default": 100
-                    },
-                    "offset": {
-                        "type": "integer",
-                        "description": "Offset for pagination (default: 0)",
-                        "default": 0
-                    },
-                    "filters": {
-                        "type": "object",
-                        "description": "Optional metadata filters",
-                        "default": {}
-                    }
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "project_id": {
+                    "type": "string",
+                    "description": "Project identifier (required)"
                 },
-                "required": ["project_id", "agent_id"]
-            }
+                "agent_id": {
+                    "type": "string",
+                    "description": "Agent identifier (required)"
+                },
+                "limit": {
+                    "type": "integer",
+                    "description": "Maximum number of results (default: 100)",
+                    "default": 100
+                },
+                "offset": {
+                    "type": "integer",
+                    "description": "Offset for pagination (default: 0)",
+                    "default": 0
+                },
+                "filters": {
+                    "type": "object",
+                    "description": "Optional metadata filters",
+                    "default": {}
+                },
+                "verbose": {
+                    "type": "boolean",
+                    "description": "Include each memory's full metadata instead of "
+                                   "a category and tag summary (default: false)",
+                    "default": False
+                }
+            },
+            "required": ["project_id", "agent_id"]
+        }
+    ),
+    Tool(
+        name="get_memory_suggestions",
+        description=(
+            "Get suggestions and best practices for structuring memories. "
+            "Returns suggested categories, metadata fields, examples, and tips."
         ),
-        Tool(
-            name="get_memory_suggestions",
-            description=(
-                "Get suggestions and best practices for structuring memories. "
-                "Returns suggested categories, metadata fields, examples, and tips."
-            ),
-            inputSchema={
-                "type": "object",
-                "properties": {},
-                "required": []
-            }
+        inputSchema={
+            "type": "object",
+            "properties": {},
+            "required": []
+        }
+    ),
+    Tool(
+        name="create_scratchpad",
+        description=(
+            "Create a scratchpad for an agent in a project. "
+            "Each agent can have ONE scratchpad per project for taking notes, "
+            "tracking TODOs, or jotting down temporary information."
         ),
-        Tool(
-            name="create_scratchpad",
-            description=(
-                "Create a scratchpad for an agent in a project. "
-                "Each agent can have ONE scratchpad per project for taking notes, "
-                "tracking TODOs, or jotting down temporary information."
-            ),
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "project_id": {
-                        "type": "string",
-                        "description": "Project identifier (required)"
-                    },
-                    "agent_id": {
-                        "type": "string",
-                        "description": "Agent identifier (required)"
-                    },
-                    "content": {
-                        "type": "string",
-                        "description": "Initial scratchpad content (optional, can be empty)",
-                        "default": ""
-                    }
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "project_id": {
+                    "type": "string",
+                    "description": "Project identifier (required)"
                 },
-                "required": ["project_id", "agent_id"]
-            }
-        ),
-        Tool(
-            name="get_scratchpad",
-            description="Get the scratchpad for an agent in a project.",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "project_id": {
-                        "type": "string",
-                        "description": "Project identifier (required)"
-                    },
-                    "agent_id": {
-                        "type": "string",
-                        "description": "Agent identifier (required)"
-                    }
+                "agent_id": {
+                    "type": "string",
+                    "description": "Agent identifier (required)"
                 },
-                "required": ["project_id", "agent_id"]
-            }
-        ),
-        Tool(
-            name="update_scratchpad",
-            description="Update the scratchpad content for an agent in a project.",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "project_id": {
-                        "type": "string",
-                        "description": "Project identifier (required)"
-                    },
-                    "agent_id": {
-                        "type": "string",
-                        "description": "Agent identifier (required)"
-                    },
-                    "content": {
-                        "type": "string",
-                        "description": "New scratchpad content (required)"
-                    }
+                "content": {
+                    "type": "string",
+                    "description": "Initial scratchpad content (optional, can be empty)",
+                    "default": ""
+                }
+            },
+            "required": ["project_id", "agent_id"]
+        }
+    ),
+    Tool(
+        name="get_scratchpad",
+        description="Get the scratchpad for an agent in a project.",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "project_id": {
+                    "type": "string",
+                    "description": "Project identifier (required)"
                 },
-                "required": ["project_id", "agent_id", "content"]
-            }
-        ),
-        Tool(
-            name="delete_scratchpad",
-            description="Delete the scratchpad for an agent in a project.",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "project_id": {
-                        "type": "string",
-                        "description": "Project identifier (required)"
-                    },
-                    "agent_id": {
-                        "type": "string",
-                        "description": "Agent identifier (required)"
-                    }
+                "agent_id": {
+                    "type": "string",
+                    "description": "Agent identifier (required)"
+                }
+            },
+            "required": ["project_id", "agent_id"]
+        }
+    ),
+    Tool(
+        name="update_scratchpad",
+        description="Update the scratchpad content for an agent in a project.",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "project_id": {
+                    "type": "string",
+                    "description": "Project identifier (required)"
                 },
-                "required": ["project_id", "agent_id"]
-            }
-        ),
+                "agent_id": {
+                    "type": "string",
+                    "description": "Agent identifier (required)"
+                },
+                "content": {
+                    "type": "string",
+                    "description": "New scratchpad content (required)"
+                }
+            },
+            "required": ["project_id", "agent_id", "content"]
+        }
+    ),
+    Tool(
+        name="delete_scratchpad",
+        description="Delete the scratchpad for an agent in a project.",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "project_id": {
+                    "type": "string",
+                    "description": "Project identifier (required)"
+                },
+                "agent_id": {
+                    "type": "string",
+                    "description": "Agent identifier (required)"
+                }
+            },
+            "required": ["project_id", "agent_id"]
+        }
+    ),
+]
+
+
+async def _store_coalesced(memory_create: MemoryCreate) -> Memory:
+    """Store a memory together with any others requested in the same window.
+    
+    The first call opens a STORE_BATCH_WINDOW window; every call arriving
+    before it closes is written in the same batch, so a burst of stores to
+    one collection shares one embedding forward pass and one ChromaDB add.
+    
+    Args:
+        memory_create: Memory creation request
+        
+    Returns:
+        Created Memory object
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    _pending_stores.append((memory_create, future))
+    if len(_pending_stores) == 1:
+        loop.call_later(STORE_BATCH_WINDOW, _flush_stores)
+    return await future
+
+
+def _store_batch(creates: List[MemoryCreate]) -> List[Union[Memory, Exception]]:
+    """Store coalesced requests so that one failing request fails only itself.
+    
+    Each collection gets its own store_memories() call, which is how that
+    call batches its work anyway. A failed call has written nothing, so its
+    requests are retried one at a time to find the ones that fail.
+    
+    Args:
+        creates: Memory creation requests
+        
+    Returns:
+        The created Memory or the raised exception for each request, in order
+    """
+    groups: Dict[Tuple[str, str], List[int]] = defaultdict(list)
+    for position, create in enumerate(creates):
+        groups[(create.project_id, create.agent_id)].append(position)
+    
+    results: List[Union[Memory, Exception]] = [None] * len(creates)
+    for positions in groups.values():
+        try:
+            memories = memory_store.store_memories([creates[p] for p in positions])
+        except Exception as e:
+            if len(positions) == 1:
+                results[positions[0]] = e
+                continue
+            for position in positions:
+                try:
+                    results[position] = memory_store.store_memories([creates[position]])[0]
+                except Exception as item_error:
+                    results[position] = item_error
+            continue
+        
+        for position, memory in zip(positions, memories):
+            results[position] = memory
+    
+    return results
+
+
+def _flush_stores() -> None:
+    """Write every pending store_memory call as one batch."""
+    # Callers cancelled while waiting don't get their memory written
+    batch = [(create, future) for create, future in _pending_stores if not future.done()]
+    _pending_stores.clear()
+    if not batch:
+        return
+    task = asyncio.ensure_future(
+        asyncio.to_thread(_store_batch, [create for create, _ in batch])
+    )
+    
+    def resolve(task: "asyncio.Task[List[Union[Memory, Exception]]]") -> None:
+        if task.cancelled():
+            # e.g. the event loop shutting down; don't leave callers waiting
+            for _, future in batch:
+                future.cancel()
+            return
+        error = task.exception()
+        for index, (_, future) in enumerate(batch):
+            if future.done():
+                continue  # Caller was cancelled
+            result = error if error is not None else task.result()[index]
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+    
+    task.add_done_callback(resolve)
+
+
+@app.list_tools()
+async def list_tools() -> List[Tool]:
+    """List available MCP tools."""
+    return _TOOLS
+
+
+async def _handle_store_memory(arguments: Dict[str, Any]) -> List[TextContent]:
+    """Handle the store_memory tool."""
+    memory_create = MemoryCreate(
+        project_id=arguments["project_id"],
+        agent_id=arguments["agent_id"],
+        content=arguments["content"],
+        metadata=arguments.get("metadata") or _EMPTY_METADATA
+    )
+    memory = await _store_coalesced(memory_create)
+    return [TextContent(
+        type="text",
+        text=f"Memory stored successfully!\n\n"
+             f"Memory ID: {memory.memory_id}\n"
+             f"Content: {memory.content}\n"
+             f"Metadata: {_metadata_json(memory.metadata)}\n"
+             f"Embedding: {memory.embedding_provider}/{memory.embedding_model}"
+    )]
+
+
+async def _handle_store_memories(arguments: Dict[str, Any]) -> List[TextContent]:
+    """Handle the store_memories tool."""
+    memory_creates = [
+        MemoryCreate(
+            project_id=arguments["project_id"],
+            agent_id=arguments["agent_id"],
+            content=item["content"],
+            metadata=item.get("metadata") or _EMPTY_METADATA
+        )
+        for item in arguments["memories"]
+    ]
+    # One embedding call and one ChromaDB add for the whole list
+    memories = await asyncio.to_thread(memory_store.store_memories, memory_creates)
+    return [TextContent(
+        type="text",
+        text=f"Stored {len(memories)} memories successfully!\n\n" + "".join(
+            f"- Memory ID: {memory.memory_id}\n" for memory in memories
+        )
+    )]
+
+
+async def _handle_search_memories(arguments: Dict[str, Any]) -> List[TextContent]:
+    """Handle the search_memories tool."""
+    results = await asyncio.to_thread(
+        memory_store.search_memories,
+        project_id=arguments["project_id"],
+        agent_id=arguments["agent_id"],
+        query=arguments["query"],
+        limit=arguments.get("limit", 10),
+        filters=arguments.get("filters")
+    )
+    
+    if not results:
+        return [TextContent(
+            type="text",
+            text="No memories found matching your query."
+        )]
+    
+    # One content block per result, so no single huge string is built
+    return [
+        TextContent(type="text", text=f"Found {len(results)} relevant memories:\n\n")
+    ] + [
+        TextContent(
+            type="text",
+            text=f"{i}. [Score: {result.similarity_score:.3f}] "
+                 f"(ID: {result.memory.memory_id})\n"
+                 f"   {result.memory.content}\n"
+                 f"   Metadata: {_metadata_json(result.memory.metadata)}\n\n"
+        )
+        for i, result in enumerate(results, 1)
+    ]
+
+
+async def _handle_get_memory(arguments: Dict[str, Any]) -> List[TextContent]:
+    """Handle the get_memory tool."""
+    memory = await asyncio.to_thread(
+        memory_store.get_memory,
+        project_id=arguments["project_id"],
+        agent_id=arguments["agent_id"],
+        memory_id=arguments["memory_id"]
+    )
+    
+    if not memory:
+        return [TextContent(
+            type="text",
+            text=f"Memory with ID '{arguments['memory_id']}' not found."
+        )]
+    
+    return [TextContent(
+        type="text",
+        text=f"Memory ID: {memory.memory_id}\n"
+             f"Content: {memory.content}\n"
+             f"Metadata: {_metadata_json(memory.metadata)}\n"
+             f"Created: {memory.created_at}\n"
+             f"Updated: {memory.updated_at}\n"
+             f"Embedding: {memory.embedding_provider}/{memory.embedding_model}"
+    )]
+
+
+async def _handle_update_memory(arguments: Dict[str, Any]) -> List[TextContent]:
+    """Handle the update_memory tool."""
+    update = MemoryUpdate(
+        content=arguments.get("content"),
+        metadata=arguments.get("metadata")
+    )
+    
+    memory = await asyncio.to_thread(
+        memory_store.update_memory,
+        project_id=arguments["project_id"],
+        agent_id=arguments["agent_id"],
+        memory_id=arguments["memory_id"],
+        update=update
+    )
+    
+    if not memory:
+        return [TextContent(
+            type="text",
+            text=f"Memory with ID '{arguments['memory_id']}' not found."
+        )]
+    
+    return [TextContent(
+        type="text",
+        text=f"Memory updated successfully!\n\n"
+             f"Memory ID: {memory.memory_id}\n"
+             f"Content: {memory.content}\n"
+             f"Metadata: {_metadata_json(memory.metadata)}\n"
+             f"Updated: {memory.updated_at}"
+    )]
+
+
+async def _handle_delete_memory(arguments: Dict[str, Any]) -> List[TextContent]:
+    """Handle the delete_memory tool."""
+    success = await asyncio.to_thread(
+        memory_store.delete_memory,
+        project_id=arguments["project_id"],
+        agent_id=arguments["agent_id"],
+        memory_id=arguments["memory_id"]
+    )
+    
+    if success:
+        return [TextContent(
+            type="text",
+            text=f"Memory '{arguments['memory_id']}' deleted successfully."
+        )]
+    else:
+        return [TextContent(
+            type="text",
+            text=f"Failed to delete memory '{arguments['memory_id']}'."
+        )]
+
+
+async def _handle_list_memories(arguments: Dict[str, Any]) -> List[TextContent]:
+    """Handle the list_memories tool."""
+    metadatas = await asyncio.to_thread(
+        memory_store.list_memories,
+        project_id=arguments["project_id"],
+        agent_id=arguments["agent_id"],
+        limit=arguments.get("limit", 100),
+        offset=arguments.get("offset", 0),
+        filters=arguments.get("filters")
+    )
+    
+    if not metadatas:
+        return [TextContent(
+            type="text",
+            text="No memories found."
+        )]
+    
+    # Full metadata only on request; get_memory shows it for a single memory
+    if arguments.get("verbose", False):
+        label, render = "Metadata", _metadata_json
+    else:
+        label, render = "Summary", _metadata_summary
+    
+    return [
+        TextContent(type="text", text=f"Found {len(metadatas)} memories:\n\n")
+    ] + [
+        TextContent(
+            type="text",
+            text=f"- ID: {metadata.memory_id}\n"
+                 f"  {label}: {render(metadata.metadata)}\n"
+                 f"  Created: {metadata.created_at}\n"
+                 f"  Updated: {metadata.updated_at}\n\n"
+        )
+        for metadata in metadatas
     ]
 
 
+async def _handle_get_memory_suggestions(arguments: Dict[str, Any]) -> List[TextContent]:
+    """Handle the get_memory_suggestions tool."""
+    return [TextContent(type="text", text=_SUGGESTIONS_TEXT)]
+
+
+async def _handle_create_scratchpad(arguments: Dict[str, Any]) -> List[TextContent]:
+    """Handle the create_scratchpad tool."""
+    scratchpad_create = ScratchpadCreate(
+        project_id=arguments["project_id"],
+        agent_id=arguments["agent_id"],
+        content=arguments.get("content", "")
+    )
+    scratchpad = scratchpad_store.create_scratchpad(scratchpad_create)
+    
+    if not scratchpad:
+        return [TextContent(
+            type="text",
+            text=f"Scratchpad already exists for agent '{arguments['agent_id']}' "
+                 f"in project '{arguments['project_id']}'. Use update_scratchpad to modify it."
+        )]
+    
+    return [TextContent(
+        type="text",
+        text=f"Scratchpad created successfully!\n\n"
+             f"Project: {scratchpad.project_id}\n"
+             f"Agent: {scratchpad.agent_id}\n"
+             f"Content: {scratchpad.content if scratchpad.content else '(empty)'}\n"
+             f"Created: {scratchpad.created_at}"
+    )]
+
+
+async def _handle_get_scratchpad(arguments: Dict[str, Any]) -> List[TextContent]:
+    """Handle the get_scratchpad tool."""
+    scratchpad = scratchpad_store.get_scratchpad(
+        project_id=arguments["project_id"],
+        agent_id=arguments["agent_id"]
+    )
+    
+    if not scratchpad:
+        return [TextContent(
+            type="text",
+            text=f"No scratchpad found for agent '{arguments['agent_id']}' "
+                 f"in project '{arguments['project_id']}'. "
+                 f"Use create_scratchpad to create one."
+        )]
+    
+    return [TextContent(
+        type="text",
+        text=f"Scratchpad:\n\n"
+             f"{scratchpad.content}\n\n"
+             f"---\n"
+             f"Project: {scratchpad.project_id}\n"
+             f"Agent: {scratchpad.agent_id}\n"
+             f"Created: {scratchpad.created_at}\n"
+             f"Updated: {scratchpad.updated_at}"
+    )]
+
+
+async def _handle_update_scratchpad(arguments: Dict[str, Any]) -> List[TextContent]:
+    """Handle the update_scratchpad tool."""
+    update = ScratchpadUpdate(content=arguments["content"])
+    scratchpad = scratchpad_store.update_scratchpad(
+        project_id=arguments["project_id"],
+        agent_id=arguments["agent_id"],
+        update=update
+    )
+    
+    if not scratchpad:
+        return [TextContent(
+            type="text",
+            text=f"No scratchpad found for agent '{arguments['agent_id']}' "
+                 f"in project '{arguments['project_id']}'. "
+                 f"Use create_scratchpad to create one first."
+        )]
+    
+    return [TextContent(
+        type="text",
+        text=f"Scratchpad updated successfully!\n\n"
+             f"Updated: {scratchpad.updated_at}\n\n"
+             f"New content:\n{scratchpad.content}"
+    )]
+
+
+async def _handle_delete_scratchpad(arguments: Dict[str, Any]) -> List[TextContent]:
+    """Handle the delete_scratchpad tool."""
+    success = scratchpad_store.delete_scratchpad(
+        project_id=arguments["project_id"],
+        agent_id=arguments["agent_id"]
+    )
+    
+    if success:
+        return [TextContent(
+            type="text",
+            text=f"Scratchpad deleted successfully for agent '{arguments['agent_id']}' "
+                 f"in project '{arguments['project_id']}'."
+        )]
+    else:
+        return [TextContent(
+            type="text",
+            text=f"No scratchpad found to delete for agent '{arguments['agent_id']}' "
+                 f"in project '{arguments['project_id']}'."
+        )]
+
+
+# Tool handlers by tool name
+_HANDLERS: Dict[str, Callable[[Dict[str, Any]], Awaitable[List[TextContent]]]] = {
+    "store_memory": _handle_store_memory,
+    "store_memories": _handle_store_memories,
+    "search_memories": _handle_search_memories,
+    "get_memory": _handle_get_memory,
+    "update_memory": _handle_update_memory,
+    "delete_memory": _handle_delete_memory,
+    "list_memories": _handle_list_memories,
+    "get_memory_suggestions": _handle_get_memory_suggestions,
+    "create_scratchpad": _handle_create_scratchpad,
+    "get_scratchpad": _handle_get_scratchpad,
+    "update_scratchpad": _handle_update_scratchpad,
+    "delete_scratchpad": _handle_delete_scratchpad,
+}
+
+
 @app.call_tool()
 async def call_tool(name: str, arguments: Any) -> List[TextContent]:
     """Handle tool calls."""
-    global memory_store, scratchpad_store
+    if _stores_ready is not None:
+        try:
+            # Shielded so a cancelled tool call doesn't cancel initialization
+            await asyncio.shield(_stores_ready)
+        except Exception:
+            pass  # Already logged; reported as not initialized below
     
     if memory_store is None or scratchpad_store is None:
         return [TextContent(
@@ -378,263 +900,15 @@ async def call_tool(name: str, arguments: Any) -> List[TextContent]:
             text="Error: Stores not initialized"
         )]
     
+    handler = _HANDLERS.get(name)
+    if handler is None:
+        return [TextContent(
+            type="text",
+            text=f"Unknown tool: {name}"
+        )]
+    
     try:
-        if name == "store_memory":
-            memory_create = MemoryCreate(
-                project_id=arguments["project_id"],
-                agent_id=arguments["agent_id"],
-                content=arguments["content"],
-                metadata=arguments.get("metadata", {})
-            )
-            memory = memory_store.store_memory(memory_create)
-            return [TextContent(
-                type="text",
-                text=f"Memory stored successfully!\n\n"
-                     f"Memory ID: {memory.memory_id}\n"
-                     f"Content: {memory.content}\n"
-                     f"Metadata: {memory.metadata}\n"
-                     f"Embedding: {memory.embedding_provider}/{memory.embedding_model}"
-            )]
-        
-        elif name == "search_memories":
-            results = memory_store.search_memories(
-                project_id=arguments["project_id"],
-                agent_id=arguments["agent_id"],
-                query=arguments["query"],
-                limit=arguments.get("limit", 10),
-                filters=arguments.get("filters")
-            )
-            
-            if not results:
-                return [TextContent(
-                    type="text",
-                    text="No memories found matching your query."
-                )]
-            
-            response = f"Found {len(results)} relevant memories:\n\n"
-            for i, result in enumerate(results, 1):
-                response += (
-                    f"{i}. [Score: {result.similarity_score:.3f}] "
-                    f"(ID: {result.memory.memory_id})\n"
-                    f"   {result.memory.content}\n"
-                    f"   Metadata: {result.memory.metadata}\n\n"
-                )
-            return [TextContent(type="text", text=response)]
-        
-        elif name == "get_memory":
-            memory = memory_store.get_memory(
-                project_id=arguments["project_id"],
-                agent_id=arguments["agent_id"],
-                memory_id=arguments["memory_id"]
-            )
-            
-            if not memory:
-                return [TextContent(
-                    type="text",
-                    text=f"Memory with ID '{arguments['memory_id']}' not found."
-                )]
-            
-            return [TextContent(
-                type="text",
-                text=f"Memory ID: {memory.memory_id}\n"
-                     f"Content: {memory.content}\n"
-                     f"Metadata: {memory.metadata}\n"
-                     f"Created: {memory.created_at}\n"
-                     f"Updated: {memory.updated_at}\n"
-                     f"Embedding: {memory.embedding_provider}/{memory.embedding_model}"
-            )]
-        
-        elif name == "update_memory":
-            update = MemoryUpdate(
-                content=arguments.get("content"),
-                metadata=arguments.get("metadata")
-            )
-            
-            memory = memory_store.update_memory(
-                project_id=arguments["project_id"],
-                agent_id=arguments["agent_id"],
-                memory_id=arguments["memory_id"],
-                update=update
-            )
-            
-            if not memory:
-                return [TextContent(
-                    type="text",
-                    text=f"Memory with ID '{arguments['memory_id']}' not found."
-                )]
-            
-            return [TextContent(
-                type="text",
-                text=f"Memory updated successfully!\n\n"
-                     f"Memory ID: {memory.memory_id}\n"
-                     f"Content: {memory.content}\n"
-                     f"Metadata: {memory.metadata}\n"
-                     f"Updated: {memory.updated_at}"
-            )]
-        
-        elif name == "delete_memory":
-            success = memory_store.delete_memory(
-                project_id=arguments["project_id"],
-                agent_id=arguments["agent_id"],
-                memory_id=arguments["memory_id"]
-            )
-            
-            if success:
-                return [TextContent(
-                    type="text",
-                    text=f"Memory '{arguments['memory_id']}' deleted successfully."
-                )]
-            else:
-                return [TextContent(
-                    type="text",
-                    text=f"Failed to delete memory '{arguments['memory_id']}'."
-                )]
-        
-        elif name == "list_memories":
-            metadatas = memory_store.list_memories(
-                project_id=arguments["project_id"],
-                agent_id=arguments["agent_id"],
-                limit=arguments.get("limit", 100),
-                offset=arguments.get("offset", 0),
-                filters=arguments.get("filters")
-            )
-            
-            if not metadatas:
-                return [TextContent(
-                    type="text",
-                    text="No memories found."
-                )]
-            
-            response = f"Found {len(metadatas)} memories:\n\n"
-            for metadata in metadatas:
-                response += (
-                    f"- ID: {metadata.memory_id}\n"
-                    f"  Metadata: {metadata.metadata}\n"
-                    f"  Created: {metadata.created_at}\n"
-                    f"  Updated: {metadata.updated_at}\n\n"
-                )
-            return [TextContent(type="text", text=response)]
-        
-        elif name == "get_memory_suggestions":
-            suggestions = get_memory_suggestions()
-            
-            response = "Memory Structure Suggestions\n" + "="*50 + "\n\n"
-            
-            response += "Suggested Categories:\n"
-            for cat in suggestions["suggested_categories"]:
-                response += f"  - {cat}\n"
-            
-            response += "\nRecommended Metadata Fields:\n"
-            for field, desc in suggestions["metadata_fields"].items():
-                response += f"  - {field}: {desc}\n"
-            
-            response += "\nExamples:\n"
-            for i, example in enumerate(suggestions["examples"], 1):
-                response += f"\n{i}. Content: {example['content']}\n"
-                response += f"   Metadata: {example['metadata']}\n"
-            
-            response += "\nBest Practices:\n"
-            for tip in suggestions["best_practices"]:
-                response += f"  - {tip}\n"
-            
-            return [TextContent(type="text", text=response)]
-        
-        elif name == "create_scratchpad":
-            scratchpad_create = ScratchpadCreate(
-                project_id=arguments["project_id"],
-                agent_id=arguments["agent_id"],
-                content=arguments.get("content", "")
-            )
-            scratchpad = scratchpad_store.create_scratchpad(scratchpad_create)
-            
-            if not scratchpad:
-                return [TextContent(
-                    type="text",
-                    text=f"Scratchpad already exists for agent '{arguments['agent_id']}' "
-                         f"in project '{arguments['project_id']}'. Use update_scratchpad to modify it."
-                )]
-            
-            return [TextContent(
-                type="text",
-                text=f"Scratchpad created successfully!\n\n"
-                     f"Project: {scratchpad.project_id}\n"
-                     f"Agent: {scratchpad.agent_id}\n"
-                     f"Content: {scratchpad.content if scratchpad.content else '(empty)'}\n"
-                     f"Created: {scratchpad.created_at}"
-            )]
-        
-        elif name == "get_scratchpad":
-            scratchpad = scratchpad_store.get_scratchpad(
-                project_id=arguments["project_id"],
-                agent_id=arguments["agent_id"]
-            )
-            
-            if not scratchpad:
-                return [TextContent(
-                    type="text",
-                    text=f"No scratchpad found for agent '{arguments['agent_id']}' "
-                         f"in project '{arguments['project_id']}'. "
-                         f"Use create_scratchpad to create one."
-                )]
-            
-            return [TextContent(
-                type="text",
-                text=f"Scratchpad:\n\n"
-                     f"{scratchpad.content}\n\n"
-                     f"---\n"
-                     f"Project: {scratchpad.project_id}\n"
-                     f"Agent: {scratchpad.agent_id}\n"
-                     f"Created: {scratchpad.created_at}\n"
-                     f"Updated: {scratchpad.updated_at}"
-            )]
-        
-        elif name == "update_scratchpad":
-            update = ScratchpadUpdate(content=arguments["content"])
-            scratchpad = scratchpad_store.update_scratchpad(
-                project_id=arguments["project_id"],
-                agent_id=arguments["agent_id"],
-                update=update
-            )
-            
-            if not scratchpad:
-                return [TextContent(
-                    type="text",
-                    text=f"No scratchpad found for agent '{arguments['agent_id']}' "
-                         f"in project '{arguments['project_id']}'. "
-                         f"Use create_scratchpad to create one first."
-                )]
-            
-            return [TextContent(
-                type="text",
-                text=f"Scratchpad updated successfully!\n\n"
-                     f"Updated: {scratchpad.updated_at}\n\n"
-                     f"New content:\n{scratchpad.content}"
-            )]
-        
-        elif name == "delete_scratchpad":
-            success = scratchpad_store.delete_scratchpad(
-                project_id=arguments["project_id"],
-                agent_id=arguments["agent_id"]
-            )
-            
-            if success:
-                return [TextContent(
-                    type="text",
-                    text=f"Scratchpad deleted successfully for agent '{arguments['agent_id']}' "
-                         f"in project '{arguments['project_id']}'."
-                )]
-            else:
-                return [TextContent(
-                    type="text",
-                    text=f"No scratchpad found to delete for agent '{arguments['agent_id']}' "
-                         f"in project '{arguments['project_id']}'."
-                )]
-        
-        else:
-            return [TextContent(
-                type="text",
-                text=f"Unknown tool: {name}"
-            )]
+        return await handler(arguments)
     
     except Exception as e:
         logger.error(f"Error in tool {name}: {str(e)}", exc_info=True)
@@ -644,11 +918,10 @@ async def call_tool(name: str, arguments: Any) -> List[TextContent]:
         )]
 
 
-async def main():
-    """Main entry point for the MCP server."""
+def _init_stores() -> None:
+    """Create the memory and scratchpad stores."""
     global memory_store, scratchpad_store
     
-    # Initialize stores
     logger.info("Initializing memAlpha...")
     try:
         embedding_provider = get_embedding_provider()
@@ -661,8 +934,28 @@ async def main():
         scratchpad_store = ScratchpadStore()
         logger.info(f"Scratchpad store initialized at: {scratchpad_store.data_path}")
     except Exception as e:
-        logger.error(f"Failed to initialize: {str(e)}")
+        logger.error(f"Failed to initialize: {str(e)}", exc_info=True)
         raise
+
+
+def _start_init_stores() -> "asyncio.Future[None]":
+    """Start creating the stores in a worker thread.
+    
+    Returns:
+        Future that tool calls await before using the stores
+    """
+    future = asyncio.ensure_future(asyncio.to_thread(_init_stores))
+    # Mark a failure as retrieved; _init_stores has already logged it
+    future.add_done_callback(lambda future: future.cancelled() or future.exception())
+    return future
+
+
+async def main():
+    """Main entry point for the MCP server."""
+    global _stores_ready
+    
+    # Initialize stores while the MCP handshake runs; tool calls wait for it
+    _stores_ready = _start_init_stores()
     
     # Run the server
     logger.info("Starting MCP server...")
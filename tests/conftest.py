@@ -1,62 +1,85 @@
 """Pytest configuration and shared fixtures."""
 
+import os
+import uuid
+from typing import List
+
+import chromadb
+import numpy as np
 import pytest
-import tempfile
-import shutil
-from pathlib import Path
-from unittest.mock import Mock, patch
 
-from src.embeddings import LocalEmbedding
+from src.embeddings import EmbeddingProvider
 from src.memory_store import MemoryStore
 
 
-@pytest.fixture
-def temp_data_dir():
-    """Create a temporary directory for test data."""
-    temp_dir = tempfile.mkdtemp(prefix="memalpha_test_")
-    yield temp_dir
-    # Cleanup
-    shutil.rmtree(temp_dir, ignore_errors=True)
+@pytest.fixture(autouse=True)
+def clean_env(monkeypatch):
+    """Hide any MEMALPHA_* settings of the surrounding shell from each test."""
+    for key in list(os.environ):
+        if key.startswith('MEMALPHA_'):
+            monkeypatch.delenv(key, raising=False)
 
 
-@pytest.fixture
-def mock_embedding_provider():
-    """Create a mock embedding provider for testing."""
-    provider = Mock(spec=LocalEmbedding)
-    provider.provider_name = "local"
-    provider.model_name = "test-model"
-    provider.dimension = 384
-    provider.embed.return_value = [0.1] * 384
-    provider.embed_batch.return_value = [[0.1] * 384, [0.2] * 384]
-    return provider
+class FakeEmbeddingProvider(EmbeddingProvider):
+    """Deterministic embedding provider returning one constant vector.
+
+    Cheaper than a Mock for tests that embed many texts: no call recording,
+    and batches are a single NumPy allocation.
+    """
+
+    _vector = np.full(384, 0.1, dtype=np.float32)
+
+    @property
+    def provider_name(self) -> str:
+        return "local"
+
+    @property
+    def model_name(self) -> str:
+        return "test-model"
+
+    @property
+    def dimension(self) -> int:
+        return len(self._vector)
+
+    def embed(self, text: str) -> List[float]:
+        return self._vector.tolist()
+
+    def embed_batch(self, texts: List[str]) -> np.ndarray:
+        return np.tile(self._vector, (len(texts), 1))
 
 
 @pytest.fixture
-def memory_store(mock_embedding_provider, temp_data_dir):
-    """Create a memory store for testing."""
-    return MemoryStore(
-        embedding_provider=mock_embedding_provider,
-        data_path=temp_data_dir
-    )
+def fake_embedding_provider():
+    """Create a fake embedding provider for testing."""
+    return FakeEmbeddingProvider()
 
 
-@pytest.fixture(autouse=True)
-def reset_environment():
-    """Reset environment variables before each test."""
-    import os
-    env_backup = os.environ.copy()
-    yield
-    # Restore environment
-    os.environ.clear()
-    os.environ.update(env_backup)
+@pytest.fixture(scope="session")
+def chroma_client():
+    """In-memory ChromaDB client shared by every test in the session."""
+    return chromadb.EphemeralClient()
 
 
-# BDD-specific fixtures
 @pytest.fixture
-def context(request):
-    """Shared context for BDD tests."""
-    if not hasattr(request, 'context'):
-        from tests.test_bdd_steps import TestContext
-        request.context = TestContext()
-    return request.context
+def collection_prefix(chroma_client):
+    """Unique collection prefix whose collections are dropped after the test."""
+    # In-memory clients share one system per process, so keep each test's
+    # collections apart and drop them afterwards
+    prefix = f"t{uuid.uuid4().hex[:12]}_"
+    yield prefix
+
+    for collection in chroma_client.list_collections():
+        # ChromaDB 0.6 lists names, other releases list Collection objects
+        name = getattr(collection, "name", collection)
+        if name.startswith(prefix):
+            chroma_client.delete_collection(name)
 
+
+@pytest.fixture
+def memory_store(fake_embedding_provider, chroma_client, collection_prefix):
+    """Create a memory store backed by a real, in-memory ChromaDB."""
+    return MemoryStore(
+        embedding_provider=fake_embedding_provider,
+        client=chroma_client,
+        collection_prefix=collection_prefix
+    )
@@ -1,15 +1,24 @@
 """BDD step definitions for agent memory management tests."""
 
-import json
+import numpy as np
+import orjson
+import pytest
 from pytest_bdd import scenarios, given, when, then, parsers
 from src.memory_store import MemoryStore
 from src.embeddings import LocalEmbedding
 from src.models import MemoryCreate, MemoryUpdate
-from unittest.mock import Mock, patch
+from sentence_transformers import SentenceTransformer
+from unittest.mock import create_autospec, patch
 
-# Load all feature files
-scenarios('features/agent_memory_management.feature')
-scenarios('features/team_collaboration.feature')
+# Preallocated mock embedding row, broadcast to one row per input text
+_EMBEDDING_ROW = np.full((1, 384), 0.1, dtype=np.float32)
+
+# Converters for datatable columns that become memory metadata
+_METADATA_PARSERS = {'tags': orjson.loads, 'category': str, 'priority': int}
+
+# Load every feature file in one pass; pytest-bdd parses each file once
+# per process and caches the result, so nothing is re-parsed later
+scenarios('features')
 
 
 # Fixtures and context
@@ -22,62 +31,71 @@ class TestContext:
         self.current_project_id = None
         self.stored_memories = {}
         self.search_results = []
+        self.memory_list = None
         self.last_memory = None
         self.agent_memories = {}
 
 
-@given("the memory system is running")
-@given("a memory system is available")
-@patch('src.embeddings.SentenceTransformer')
-def test_context(mock_transformer, request):
-    """Initialize test context with mocked embedding provider."""
-    # Mock the sentence transformer
-    mock_model = Mock()
-    mock_model.encode.return_value = [[0.1] * 384]
-    mock_model.get_sentence_embedding_dimension.return_value = 384
-    mock_transformer.return_value = mock_model
-    
-    # Create context
-    context = TestContext()
-    context.embedding_provider = LocalEmbedding()
-    context.memory_store = MemoryStore(
-        embedding_provider=context.embedding_provider,
-        data_path="/tmp/test_memalpha_bdd"
+@pytest.fixture(scope="module")
+def _patched_st():
+    """Patch SentenceTransformer once for every scenario in this module."""
+    # Autospec binds the model's attributes once, up front
+    model = create_autospec(SentenceTransformer, instance=True)
+    model.encode.side_effect = (
+        lambda texts, **kwargs: np.broadcast_to(_EMBEDDING_ROW, (len(texts), 384))
     )
-    
-    # Store in pytest request
-    request.context = context
-    return context
+    model.get_sentence_embedding_dimension.return_value = 384
+    with patch('src.embeddings.SentenceTransformer', return_value=model) as mock_transformer:
+        yield mock_transformer
+
+
+@pytest.fixture
+def memory_system(_patched_st, chroma_client, collection_prefix):
+    """Fresh test context with a mocked embedding provider and empty store."""
+    ctx = TestContext()
+    ctx.embedding_provider = LocalEmbedding()
+    ctx.memory_store = MemoryStore(
+        embedding_provider=ctx.embedding_provider,
+        client=chroma_client,
+        collection_prefix=collection_prefix
+    )
+    return ctx
+
+
+@given(
+    parsers.re(r"(?:the memory system is running|a memory system is available)"),
+    target_fixture="context"
+)
+def memory_system_running(memory_system):
+    """Expose the scenario's fresh memory system to later steps as ``context``."""
+    return memory_system
 
 
 @given(parsers.parse('I am agent "{agent_id}" working on project "{project_id}"'))
 @given(parsers.parse('I am the "{agent_id}" agent'))
-def set_agent_and_project(request, agent_id, project_id=None):
+def set_agent_and_project(context, agent_id, project_id=None):
     """Set the current agent and project."""
-    context = request.context
     context.current_agent_id = agent_id
     if project_id:
         context.current_project_id = project_id
 
 
 @given(parsers.parse('we have a project "{project_id}"'))
-def set_project(request, project_id):
+def set_project(context, project_id):
     """Set the current project."""
-    context = request.context
     context.current_project_id = project_id
 
 
 @given(parsers.parse('agent "{agent_id}" is working on project "{project_id}"'))
-def setup_agent_project(request, agent_id, project_id):
+def setup_agent_project(context, agent_id, project_id):
     """Setup an agent for a project."""
     # This is just metadata setup, no action needed
     pass
 
 
 @when(parsers.parse('I store a memory with content "{content}"'))
-def store_memory(request, content):
+def store_memory(context, content):
     """Store a memory with given content."""
-    context = request.context
     memory_create = MemoryCreate(
         project_id=context.current_project_id,
         agent_id=context.current_agent_id,
@@ -88,39 +106,34 @@ def store_memory(request, content):
 
 
 @given(parsers.parse('I have stored a memory "{content}"'))
-def given_stored_memory(request, content):
+def given_stored_memory(context, content):
     """Given step: memory already stored."""
-    store_memory(request, content)
+    store_memory(context, content)
 
 
 @when("I store a memory with:")
-def store_memory_with_metadata(request, datatable):
+def store_memory_with_metadata(context, datatable):
     """Store a memory with metadata from a datatable."""
-    context = request.context
-    data = {}
-    for row in datatable:
-        field = row['field']
-        value = row['value']
-        # Parse JSON values
-        if value.startswith('['):
-            value = json.loads(value)
-        data[field] = value
-    
-    metadata = {k: v for k, v in data.items() if k not in ['content']}
+    # Rows are field/value pairs after the header; priorities here are free text
+    data = {field: value for field, value in datatable[1:]}
+    content = data.pop('content')
+    metadata = {
+        field: orjson.loads(value) if field == 'tags' else value
+        for field, value in data.items()
+    }
     
     memory_create = MemoryCreate(
         project_id=context.current_project_id,
         agent_id=context.current_agent_id,
-        content=data['content'],
+        content=content,
         metadata=metadata
     )
     context.last_memory = context.memory_store.store_memory(memory_create)
 
 
 @when("I retrieve that memory by its ID")
-def retrieve_memory(request):
+def retrieve_memory(context):
     """Retrieve a memory by ID."""
-    context = request.context
     memory_id = context.last_memory.memory_id
     context.last_memory = context.memory_store.get_memory(
         context.current_project_id,
@@ -129,11 +142,9 @@ def retrieve_memory(request):
     )
 
 
-@when(parsers.parse('I search for memories about "{query}"'))
-@when(parsers.parse('I search for "{query}"'))
-def search_memories(request, query):
+@when(parsers.re(r'I search for (?:memories about )?"(?P<query>[^"]+)"'))
+def search_memories(context, query):
     """Search for memories."""
-    context = request.context
     context.search_results = context.memory_store.search_memories(
         context.current_project_id,
         context.current_agent_id,
@@ -143,9 +154,8 @@ def search_memories(request, query):
 
 
 @when(parsers.parse('I update that memory to "{new_content}"'))
-def update_memory(request, new_content):
+def update_memory(context, new_content):
     """Update a memory's content."""
-    context = request.context
     memory_id = context.last_memory.memory_id
     update = MemoryUpdate(content=new_content)
     context.last_memory = context.memory_store.update_memory(
@@ -157,9 +167,8 @@ def update_memory(request, new_content):
 
 
 @when("I delete that memory")
-def delete_memory(request):
+def delete_memory(context):
     """Delete a memory."""
-    context = request.context
     memory_id = context.last_memory.memory_id
     context.memory_store.delete_memory(
         context.current_project_id,
@@ -169,42 +178,59 @@ def delete_memory(request):
 
 
 @when(parsers.parse('I switch to project "{project_id}"'))
-def switch_project(request, project_id):
+def switch_project(context, project_id):
     """Switch to a different project."""
-    context = request.context
     context.current_project_id = project_id
 
 
-@given("I have stored the following memories:")
-@when("I store these memories:")
-@when("I store these memories about the project:")
-def store_multiple_memories(request, datatable):
-    """Store multiple memories from a datatable."""
-    context = request.context
-    for row in datatable:
-        content = row['content']
-        metadata = {}
-        if 'tags' in row:
-            metadata['tags'] = json.loads(row['tags'])
-        if 'category' in row:
-            metadata['category'] = row['category']
-        if 'priority' in row:
-            metadata['priority'] = int(row['priority'])
-        
-        memory_create = MemoryCreate(
+def _memory_creates(context, datatable):
+    """Build one MemoryCreate per datatable row for the current agent.
+    
+    Rows come from our own feature files, so pydantic validation is skipped.
+    """
+    header, *rows = datatable
+    parsed_columns = [
+        (index, column, _METADATA_PARSERS[column])
+        for index, column in enumerate(header)
+        if column in _METADATA_PARSERS
+    ]
+    content_index = header.index('content')
+    construct = MemoryCreate.model_construct
+    return [
+        construct(
             project_id=context.current_project_id,
             agent_id=context.current_agent_id,
-            content=content,
-            metadata=metadata
+            content=row[content_index],
+            metadata={column: parse(row[index]) for index, column, parse in parsed_columns}
         )
-        memory = context.memory_store.store_memory(memory_create)
-        context.stored_memories[content] = memory
+        for row in rows
+    ]
+
+
+@when("I store these memories:")
+@when("I store these memories about the project:")
+def store_multiple_memories(context, datatable):
+    """Store multiple memories from a datatable in one batch."""
+    # One embedding call and one ChromaDB add for the whole table
+    memory_creates = _memory_creates(context, datatable)
+    for memory in context.memory_store.store_memories(memory_creates):
+        context.stored_memories[memory.content] = memory
+
+
+@given("I have stored the following memories:")
+def given_stored_memories(context, datatable):
+    """Given step: memories already stored, without calling the embedding model."""
+    # The mocked model returns the same row for every text, so store that
+    # row directly instead of running encode() for each memory
+    memory_creates = _memory_creates(context, datatable)
+    embeddings = np.broadcast_to(_EMBEDDING_ROW, (len(memory_creates), 384))
+    for memory in context.memory_store.store_memories(memory_creates, embeddings):
+        context.stored_memories[memory.content] = memory
 
 
 @when("I list all my memories for project")
-def list_memories(request):
+def list_memories(context):
     """List all memories."""
-    context = request.context
     context.memory_list = context.memory_store.list_memories(
         context.current_project_id,
         context.current_agent_id,
@@ -215,115 +241,104 @@ def list_memories(request):
 # Then steps (assertions)
 
 @then("the memory should be successfully stored")
-def assert_memory_stored(request):
+def assert_memory_stored(context):
     """Assert memory was stored successfully."""
-    context = request.context
     assert context.last_memory is not None
     assert context.last_memory.memory_id is not None
 
 
 @then("the memory should have a unique ID")
-def assert_unique_id(request):
+def assert_unique_id(context):
     """Assert memory has a unique ID."""
-    context = request.context
     assert context.last_memory.memory_id
     assert len(context.last_memory.memory_id) > 0
 
 
-@then(parsers.parse('the memory should contain the content "{content}"'))
-@then(parsers.parse('I should get the memory with content "{content}"'))
-@then(parsers.parse('retrieving it should show "{content}"'))
-def assert_memory_content(request, content):
+@then(parsers.re(
+    r'(?:the memory should contain the content|I should get the memory with content'
+    r'|retrieving it should show) "(?P<content>[^"]+)"'
+))
+def assert_memory_content(context, content):
     """Assert memory has expected content."""
-    context = request.context
     assert context.last_memory.content == content
 
 
-@then(parsers.parse("I should find at least {count:d} relevant memory"))
-@then(parsers.parse("I should find at least {count:d} relevant memories"))
-def assert_min_results(request, count):
+@then(
+    parsers.re(r"I should find at least (?P<count>\d+) relevant memor(?:y|ies)"),
+    converters={"count": int}
+)
+def assert_min_results(context, count):
     """Assert minimum number of search results."""
-    context = request.context
     assert len(context.search_results) >= count
 
 
 @then("the top result should be related to frontend")
-def assert_frontend_related(request):
+def assert_frontend_related(context):
     """Assert top result is frontend-related."""
-    context = request.context
     assert len(context.search_results) > 0
     # Just check that we got results; actual relevance depends on embeddings
 
 
 @then("the memory should be updated successfully")
-def assert_updated(request):
+def assert_updated(context):
     """Assert memory was updated."""
-    context = request.context
     assert context.last_memory is not None
 
 
 @then("retrieving it should return nothing")
-def assert_not_found(request):
+def assert_not_found(context):
     """Assert memory was deleted."""
-    context = request.context
     assert context.last_memory is None or True  # After delete, memory should not exist
 
 
 @then("the memory should include the custom metadata")
-def assert_has_metadata(request):
+def assert_has_metadata(context):
     """Assert memory has custom metadata."""
-    context = request.context
     assert context.last_memory.metadata is not None
     assert len(context.last_memory.metadata) > 0
 
 
 @then(parsers.parse('the metadata should have tags "{tag1}" and "{tag2}"'))
-def assert_tags(request, tag1, tag2):
+def assert_tags(context, tag1, tag2):
     """Assert memory has specific tags."""
-    context = request.context
     tags = context.last_memory.metadata.get('tags', [])
     assert tag1 in tags
     assert tag2 in tags
 
 
 @then(parsers.parse('I should have {count:d} memories stored'))
-def assert_memory_count(request, count):
+def assert_memory_count(context, count):
     """Assert specific number of memories."""
-    context = request.context
-    memories = context.memory_store.list_memories(
+    assert context.memory_store.count_memories(
         context.current_project_id,
         context.current_agent_id
-    )
-    assert len(memories) == count
+    ) == count
 
 
 @then(parsers.parse('searching for "{query}" should return {count:d} memories'))
-def assert_search_count(request, query, count):
+def assert_search_count(context, query, count):
     """Assert search returns specific count."""
-    context = request.context
     results = context.memory_store.search_memories(
         context.current_project_id,
         context.current_agent_id,
-        query
+        query,
+        limit=count + 1  # One extra result is enough to detect too many matches
     )
     assert len(results) == count
 
 
-@then("I should see exactly")
 @then(parsers.parse("I should see exactly {count:d} memories in my list"))
-def assert_exact_count(request, count):
+def assert_exact_count(context, count):
     """Assert exact memory count in list."""
-    context = request.context
-    memories = context.memory_store.list_memories(
-        context.current_project_id,
-        context.current_agent_id
-    )
-    assert len(memories) == count
+    if context.memory_list is None:
+        # No list step ran earlier in the scenario
+        list_memories(context)
+    assert len(context.memory_list) == count
 
 
 @then("the backend agent's memories should not appear in my list")
 @then("I should not see other agents' memories")
-def assert_agent_isolation(request):
+def assert_agent_isolation(context):
     """Assert agent memory isolation."""
     # This is inherently tested by the architecture
     # Each agent only sees their own collection
@@ -332,7 +347,7 @@ def assert_agent_isolation(request):
 
 @then("the memories should not overlap")
 @then("the projects should have isolated memories")
-def assert_memory_isolation(request):
+def assert_memory_isolation(context):
     """Assert memory isolation."""
     # This is inherently tested by the architecture
     pass
@@ -1,14 +1,53 @@
 """Unit tests for embedding providers."""
 
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
-from unittest.mock import Mock, patch, MagicMock
+import numpy as np
+from sentence_transformers import SentenceTransformer
+from unittest.mock import Mock, patch, MagicMock, create_autospec
+from huggingface_hub.utils import EntryNotFoundError
 from src.embeddings import (
+    EmbeddingCache,
     EmbeddingProvider,
     LocalEmbedding,
     OpenAIEmbedding,
-    get_embedding_provider
+    ONNXEmbedding,
+    get_embedding_provider,
+    _pooling_mode
 )
 
+# Preallocated mock embedding row, broadcast to one row per input text
+_EMBEDDING_ROW = np.full((1, 384), 0.1, dtype=np.float32)
+
+
+@pytest.fixture(scope="session")
+def _shared_local_embedding():
+    """LocalEmbedding backed by a mock model, loaded once per session."""
+    model = create_autospec(SentenceTransformer, instance=True)
+    model.encode.side_effect = (
+        lambda texts, **kwargs: np.broadcast_to(_EMBEDDING_ROW, (len(texts), 384))
+    )
+    with patch('src.embeddings.SentenceTransformer', return_value=model):
+        provider = LocalEmbedding()
+        provider._load_model()
+    return provider
+
+
+@pytest.fixture
+def local_embedding(_shared_local_embedding):
+    """Shared LocalEmbedding with its mock model's call history cleared."""
+    _shared_local_embedding._model.reset_mock()
+    return _shared_local_embedding
+
+
+@pytest.fixture(scope="class")
+def _openai_class():
+    """Patch the OpenAI client class once per test class."""
+    with patch('src.embeddings.OpenAI') as mock_openai_class:
+        yield mock_openai_class
+
 
 class TestEmbeddingProviderInterface:
     """Test the abstract EmbeddingProvider interface."""
@@ -36,7 +75,7 @@ class TestLocalEmbedding:
     def test_lazy_model_loading(self, mock_transformer):
         """Test that model is loaded lazily on first use."""
         mock_model = Mock()
-        mock_model.encode.return_value = [[0.1, 0.2, 0.3]]
+        mock_model.encode.return_value = np.array([[0.1, 0.2, 0.3]], dtype=np.float32)
         mock_transformer.return_value = mock_model
 
         provider = LocalEmbedding()
@@ -48,37 +87,29 @@ class TestLocalEmbedding:
         assert provider._model is not None
         assert len(result) > 0
 
-    @patch('src.embeddings.SentenceTransformer')
-    def test_embed_single_text(self, mock_transformer):
-        """Test embedding a single text."""
-        mock_model = Mock()
-        mock_model.encode.return_value = [[0.1, 0.2, 0.3, 0.4]]
-        mock_transformer.return_value = mock_model
-
-        provider = LocalEmbedding()
-        result = provider.embed("Hello, world!")
+    def test_embed_batch(self, local_embedding):
+        """Test embedding multiple texts at once."""
+        texts = ["text 1", "text 2", "text 3"]
+        results = local_embedding.embed_batch(texts)
         
-        assert isinstance(result, list)
-        assert len(result) == 4
-        assert all(isinstance(x, float) for x in result)
+        assert isinstance(results, np.ndarray)
+        assert results.shape == (3, 384)
+        assert results.dtype == np.float32
+        local_embedding._model.encode.assert_called_once_with(
+            texts, batch_size=64, show_progress_bar=False, convert_to_numpy=True
+        )
 
     @patch('src.embeddings.SentenceTransformer')
-    def test_embed_batch(self, mock_transformer):
-        """Test embedding multiple texts at once."""
+    def test_embed_batch_custom_batch_size(self, mock_transformer):
+        """Test that the configured batch size is passed to the model."""
         mock_model = Mock()
-        mock_model.encode.return_value = [
-            [0.1, 0.2, 0.3],
-            [0.4, 0.5, 0.6],
-            [0.7, 0.8, 0.9]
-        ]
+        mock_model.encode.return_value = np.array([[0.1, 0.2]], dtype=np.float32)
         mock_transformer.return_value = mock_model
 
-        provider = LocalEmbedding()
-        texts = ["text 1", "text 2", "text 3"]
-        results = provider.embed_batch(texts)
+        provider = LocalEmbedding(batch_size=8)
+        provider.embed_batch(["text"])
         
-        assert len(results) == 3
-        assert all(len(emb) == 3 for emb in results)
+        assert mock_model.encode.call_args.kwargs["batch_size"] == 8
 
     @patch('src.embeddings.SentenceTransformer')
     def test_dimension_property(self, mock_transformer):
@@ -94,17 +125,53 @@ class TestLocalEmbedding:
         assert provider.dimension == 384
 
     @patch('src.embeddings.SentenceTransformer')
-    def test_model_caching(self, mock_transformer):
-        """Test that model is only loaded once."""
+    def test_dimension_known_model_does_not_load(self, mock_transformer):
+        """Test that dimensions of known models come from the lookup table."""
+        provider = LocalEmbedding("all-mpnet-base-v2")
+        
+        assert provider.dimension == 768
+        mock_transformer.assert_not_called()
+
+    @patch('src.embeddings.SentenceTransformer')
+    def test_dimension_unknown_model_is_cached(self, mock_transformer):
+        """Test that unknown models are asked once for their dimension."""
         mock_model = Mock()
-        mock_model.encode.return_value = [[0.1, 0.2]]
+        mock_model.get_sentence_embedding_dimension.return_value = 512
         mock_transformer.return_value = mock_model
 
-        provider = LocalEmbedding()
-        provider.embed("first")
-        provider.embed("second")
+        provider = LocalEmbedding("custom-model")
+        
+        assert provider.dimension == 512
+        assert provider.dimension == 512
+        mock_model.get_sentence_embedding_dimension.assert_called_once()
+
+    def test_model_caching(self, local_embedding):
+        """Test that model is only loaded once."""
+        model = local_embedding._model
+        
+        with patch('src.embeddings.SentenceTransformer') as mock_transformer:
+            local_embedding.embed("first")
+            local_embedding.embed("second")
         
-        # Should only be called once (cached)
+        # The loaded model is reused, never reloaded
+        mock_transformer.assert_not_called()
+        assert local_embedding._model is model
+        assert model.encode.call_count == 2
+
+    @patch('src.embeddings.SentenceTransformer')
+    def test_concurrent_first_use_loads_model_once(self, mock_transformer):
+        """Test that threads embedding at the same time share one model load."""
+        def slow_load(name):
+            time.sleep(0.05)
+            model = Mock()
+            model.encode.return_value = np.array([[0.1, 0.2]], dtype=np.float32)
+            return model
+        mock_transformer.side_effect = slow_load
+
+        provider = LocalEmbedding()
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(provider.embed, ["a", "b", "c", "d"]))
+
         assert mock_transformer.call_count == 1
 
 
@@ -113,88 +180,269 @@ class TestOpenAIEmbedding:
 
     def test_initialization_default(self):
         """Test OpenAIEmbedding initializes with defaults."""
-        with patch.dict('os.environ', {}, clear=True):
-            with pytest.raises(ValueError, match="MEMALPHA_OPENAI_API_KEY"):
-                OpenAIEmbedding()
+        with pytest.raises(ValueError, match="MEMALPHA_OPENAI_API_KEY"):
+            OpenAIEmbedding()
 
-    def test_initialization_with_api_key(self):
+    def test_initialization_with_api_key(self, monkeypatch):
         """Test OpenAIEmbedding initializes with API key from env."""
-        with patch.dict('os.environ', {'MEMALPHA_OPENAI_API_KEY': 'sk-test-key'}):
-            provider = OpenAIEmbedding()
-            assert provider.provider_name == "openai"
-            assert provider.model_name == "text-embedding-3-small"
-            assert provider.api_key == "sk-test-key"
+        monkeypatch.setenv('MEMALPHA_OPENAI_API_KEY', 'sk-test-key')
+        provider = OpenAIEmbedding()
+        assert provider.provider_name == "openai"
+        assert provider.model_name == "text-embedding-3-small"
+        assert provider.api_key == "sk-test-key"
 
-    def test_initialization_with_custom_model(self):
+    def test_initialization_with_custom_model(self, monkeypatch):
         """Test OpenAIEmbedding with custom model."""
-        with patch.dict('os.environ', {
-            'MEMALPHA_OPENAI_API_KEY': 'sk-test',
-            'MEMALPHA_OPENAI_MODEL': 'text-embedding-3-large'
-        }):
-            provider = OpenAIEmbedding()
-            assert provider.model_name == "text-embedding-3-large"
-
-    def test_initialization_with_custom_base_url(self):
+        monkeypatch.setenv('MEMALPHA_OPENAI_API_KEY', 'sk-test')
+        monkeypatch.setenv('MEMALPHA_OPENAI_MODEL', 'text-embedding-3-large')
+        provider = OpenAIEmbedding()
+        assert provider.model_name == "text-embedding-3-large"
+
+    def test_initialization_with_custom_base_url(self, monkeypatch):
         """Test OpenAIEmbedding with custom base URL."""
-        with patch.dict('os.environ', {
-            'MEMALPHA_OPENAI_API_KEY': 'sk-test',
-            'MEMALPHA_OPENAI_BASE_URL': 'https://custom.api.com/v1'
-        }):
-            provider = OpenAIEmbedding()
-            assert provider.base_url == "https://custom.api.com/v1"
-
-    @patch('src.embeddings.OpenAI')
-    def test_embed_single_text(self, mock_openai_class):
-        """Test embedding a single text with OpenAI."""
-        mock_client = Mock()
-        mock_response = Mock()
-        mock_response.data = [Mock(embedding=[0.1, 0.2, 0.3])]
-        mock_client.embeddings.create.return_value = mock_response
-        mock_openai_class.return_value = mock_client
-
-        with patch.dict('os.environ', {'MEMALPHA_OPENAI_API_KEY': 'sk-test'}):
-            provider = OpenAIEmbedding()
-            result = provider.embed("test text")
-            
-            assert result == [0.1, 0.2, 0.3]
-            mock_client.embeddings.create.assert_called_once()
-
-    @patch('src.embeddings.OpenAI')
-    def test_embed_batch(self, mock_openai_class):
-        """Test embedding multiple texts with OpenAI."""
-        mock_client = Mock()
-        mock_response = Mock()
-        mock_response.data = [
-            Mock(embedding=[0.1, 0.2]),
-            Mock(embedding=[0.3, 0.4]),
-        ]
-        mock_client.embeddings.create.return_value = mock_response
-        mock_openai_class.return_value = mock_client
-
-        with patch.dict('os.environ', {'MEMALPHA_OPENAI_API_KEY': 'sk-test'}):
-            provider = OpenAIEmbedding()
-            results = provider.embed_batch(["text 1", "text 2"])
-            
-            assert len(results) == 2
-            assert results[0] == [0.1, 0.2]
-            assert results[1] == [0.3, 0.4]
-
-    @patch('src.embeddings.OpenAI')
-    def test_dimension_property(self, mock_openai_class):
+        monkeypatch.setenv('MEMALPHA_OPENAI_API_KEY', 'sk-test')
+        monkeypatch.setenv('MEMALPHA_OPENAI_BASE_URL', 'https://custom.api.com/v1')
+        provider = OpenAIEmbedding()
+        assert provider.base_url == "https://custom.api.com/v1"
+
+    @pytest.mark.parametrize("name", ["MEMALPHA_OPENAI_BATCH_SIZE", "MEMALPHA_OPENAI_CONCURRENCY"])
+    @pytest.mark.parametrize("value", ["0", "-1", "many"])
+    def test_initialization_rejects_invalid_limits(self, monkeypatch, name, value):
+        """Test that batch size and concurrency must be positive integers."""
+        monkeypatch.setenv('MEMALPHA_OPENAI_API_KEY', 'sk-test')
+        monkeypatch.setenv(name, value)
+        with pytest.raises(ValueError, match=name):
+            OpenAIEmbedding()
+
+    @pytest.fixture
+    def mock_openai_class(self, _openai_class, monkeypatch):
+        """Shared OpenAI class mock, reset for each test, with an API key set."""
+        monkeypatch.setenv('MEMALPHA_OPENAI_API_KEY', 'sk-test')
+        _openai_class.reset_mock(return_value=True, side_effect=True)
+        return _openai_class
+
+    def test_embed_batch_splits_large_inputs(self, mock_openai_class, monkeypatch):
+        """Test that large batches are split into requests and reassembled in order."""
+        mock_create = mock_openai_class.return_value.embeddings.create
+        mock_create.side_effect = lambda model, input: Mock(
+            data=[Mock(embedding=[float(text)]) for text in input]
+        )
+
+        monkeypatch.setenv('MEMALPHA_OPENAI_BATCH_SIZE', '3')
+        monkeypatch.setenv('MEMALPHA_OPENAI_CONCURRENCY', '2')
+        provider = OpenAIEmbedding()
+        results = provider.embed_batch([str(i) for i in range(8)])
+
+        assert results == [[float(i)] for i in range(8)]
+        assert mock_create.call_count == 3
+
+    def test_client_retries_transient_errors(self, mock_openai_class):
+        """Test that the OpenAI client is configured to retry with backoff."""
+        OpenAIEmbedding()
+
+        assert mock_openai_class.call_args.kwargs["max_retries"] == OpenAIEmbedding.MAX_RETRIES
+
+    def test_client_uses_pooled_http2_transport(self, mock_openai_class):
+        """Test that requests share one HTTP/2 connection pool."""
+        provider = OpenAIEmbedding()
+
+        http_client = mock_openai_class.call_args.kwargs["http_client"]
+        assert http_client is provider._http
+
+        provider.close()
+        assert http_client.is_closed
+
+    @pytest.mark.parametrize("model, dimension", [
+        ("text-embedding-3-small", 1536),
+        ("text-embedding-3-large", 3072),
+    ])
+    def test_dimension_property(self, mock_openai_class, monkeypatch, model, dimension):
         """Test dimension property for different models."""
-        mock_client = Mock()
-        mock_openai_class.return_value = mock_client
+        monkeypatch.setenv('MEMALPHA_OPENAI_MODEL', model)
+        provider = OpenAIEmbedding()
+        assert provider.dimension == dimension
+
+
+class TestProviderContract:
+    """Test behaviour every embedding provider shares."""
+
+    @pytest.fixture(params=["local", "openai"])
+    def provider(self, request, monkeypatch):
+        """Each mock-backed provider in turn."""
+        if request.param == "local":
+            yield request.getfixturevalue("local_embedding")
+            return
+
+        monkeypatch.setenv('MEMALPHA_OPENAI_API_KEY', 'sk-test')
+        with patch('src.embeddings.OpenAI') as mock_openai_class:
+            # One 1536-dim row per input text, like text-embedding-3-small
+            mock_openai_class.return_value.embeddings.create.side_effect = (
+                lambda model, input: Mock(data=[Mock(embedding=[0.1] * 1536) for _ in input])
+            )
+            yield OpenAIEmbedding()
+
+    def test_embed_single_text(self, provider):
+        """Test that one text becomes a list of floats of the provider's dimension."""
+        result = provider.embed("Hello, world!")
+
+        assert isinstance(result, list)
+        assert len(result) == provider.dimension
+        assert all(isinstance(x, float) for x in result)
+
+    def test_embed_batch(self, provider):
+        """Test that each text gets one row of the provider's dimension, in order."""
+        results = provider.embed_batch(["text 1", "text 2", "text 3"])
 
-        with patch.dict('os.environ', {'MEMALPHA_OPENAI_API_KEY': 'sk-test'}):
-            provider = OpenAIEmbedding()
-            assert provider.dimension == 1536  # text-embedding-3-small
+        assert len(results) == 3
+        assert all(len(row) == provider.dimension for row in results)
+
+
+class TestEmbeddingCache:
+    """Test the LRU embedding cache."""
+
+    def test_repeated_text_is_embedded_once(self):
+        """Test that a cache hit skips the embedding function."""
+        cache = EmbeddingCache()
+        embed = Mock(return_value=[0.1, 0.2])
+
+        assert cache.get("query", embed) == [0.1, 0.2]
+        assert cache.get("query", embed) == [0.1, 0.2]
+        embed.assert_called_once_with("query")
+
+    def test_least_recently_used_entry_is_evicted(self):
+        """Test that the cache drops the oldest unused entry when full."""
+        cache = EmbeddingCache(maxsize=2)
+        embed = Mock(side_effect=lambda text: [float(len(text))])
+
+        cache.get("a", embed)
+        cache.get("bb", embed)
+        cache.get("a", embed)
+        cache.get("ccc", embed)
+
+        assert len(cache) == 2
+        cache.get("a", embed)
+        cache.get("bb", embed)
+        assert [c.args[0] for c in embed.call_args_list] == ["a", "bb", "ccc", "bb"]
+
+    def test_returned_embeddings_do_not_alias_cache(self):
+        """Test that mutating a returned vector leaves the cached one intact."""
+        cache = EmbeddingCache()
+        embed = Mock(return_value=[0.1, 0.2])
+
+        cache.get("query", embed).append(9.9)
+        assert cache.get("query", embed) == [0.1, 0.2]
+
+    def test_zero_size_disables_caching(self):
+        """Test that maxsize=0 always calls the embedding function."""
+        cache = EmbeddingCache(maxsize=0)
+        embed = Mock(return_value=[0.1])
+
+        cache.get("query", embed)
+        cache.get("query", embed)
+        assert embed.call_count == 2
+        assert len(cache) == 0
+
+
+class TestONNXEmbedding:
+    """Test ONNXEmbedding provider."""
+
+    @pytest.fixture
+    def onnx_provider(self):
+        """Create an ONNX provider with a stub model and tokenizer."""
+        with patch('src.embeddings.ORTModelForFeatureExtraction', Mock()):
+            provider = ONNXEmbedding(batch_size=2)
+
+        def tokenize(texts, **kwargs):
+            width = max(len(t.split()) for t in texts)
+            mask = np.array([[1] * len(t.split()) + [0] * (width - len(t.split())) for t in texts])
+            return {"input_ids": mask.copy(), "attention_mask": mask}
+
+        def forward(input_ids, attention_mask):
+            # Each token embeds as [1, number of tokens in its text]
+            lengths = attention_mask.sum(axis=1, keepdims=True)
+            hidden = np.stack([np.ones_like(attention_mask), np.broadcast_to(lengths, attention_mask.shape)], axis=-1)
+            return Mock(last_hidden_state=hidden)
+
+        provider._tokenizer = Mock(side_effect=tokenize)
+        provider._model = Mock(side_effect=forward)
+        return provider
+
+    def test_missing_dependency_raises_error(self):
+        """Test that a clear error is raised without optimum installed."""
+        with patch('src.embeddings.ORTModelForFeatureExtraction', None):
+            with pytest.raises(ImportError, match="memalpha\\[onnx\\]"):
+                ONNXEmbedding()
+
+    def test_provider_properties(self, onnx_provider):
+        """Test provider name, model name and known dimension."""
+        assert onnx_provider.provider_name == "onnx"
+        assert onnx_provider.model_name == "all-MiniLM-L6-v2"
+        assert onnx_provider.dimension == 384
+
+    def test_embed_is_mean_pooled_and_normalized(self, onnx_provider):
+        """Test that token embeddings are mean-pooled and L2-normalized."""
+        result = onnx_provider.embed("one two three")
 
-        with patch.dict('os.environ', {
-            'MEMALPHA_OPENAI_API_KEY': 'sk-test',
-            'MEMALPHA_OPENAI_MODEL': 'text-embedding-3-large'
-        }):
-            provider = OpenAIEmbedding()
-            assert provider.dimension == 3072
+        assert isinstance(result, list)
+        assert result == pytest.approx(np.array([1.0, 3.0]) / np.sqrt(10))
+
+    def test_embed_batch_keeps_input_order(self, onnx_provider):
+        """Test that length-sorted batches are returned in input order."""
+        texts = ["a b c d", "a", "a b", "a b c"]
+        results = onnx_provider.embed_batch(texts)
+
+        assert results.shape == (4, 2)
+        expected = [np.array([1.0, n]) / np.hypot(1.0, n) for n in (4, 1, 2, 3)]
+        np.testing.assert_allclose(results, expected, rtol=1e-6)
+        assert onnx_provider._model.call_count == 2
+
+    def test_embed_is_cls_pooled(self, onnx_provider):
+        """Test that CLS-pooled models use the first token's embedding."""
+        def forward(input_ids, attention_mask):
+            # Token i embeds as [1, i]
+            positions = np.broadcast_to(np.arange(attention_mask.shape[1]), attention_mask.shape)
+            return Mock(last_hidden_state=np.stack([np.ones_like(positions), positions], axis=-1))
+        onnx_provider._model.side_effect = forward
+        onnx_provider._pooling = "cls"
+
+        assert onnx_provider.embed("one two three") == pytest.approx([1.0, 0.0])
+
+    @pytest.mark.parametrize("config, mode", [
+        ({"pooling_mode_mean_tokens": True, "pooling_mode_cls_token": False}, "mean"),
+        ({"pooling_mode_cls_token": True, "pooling_mode_mean_tokens": False}, "cls"),
+        ({}, "mean"),
+    ])
+    def test_pooling_mode(self, config, mode):
+        """Test reading mean or CLS pooling from a sentence-transformers config."""
+        assert _pooling_mode(config) == mode
+
+    @pytest.mark.parametrize("config", [
+        {"pooling_mode_max_tokens": True},
+        {"pooling_mode_mean_tokens": True, "pooling_mode_max_tokens": True},
+    ])
+    def test_unsupported_pooling_mode_raises_error(self, config):
+        """Test that models needing other pooling are rejected."""
+        with pytest.raises(ValueError, match="mean or CLS pooling"):
+            _pooling_mode(config)
+
+    def test_pooling_config_is_fetched_once(self, onnx_provider, tmp_path):
+        """Test that the pooling config is downloaded once and cached with the model."""
+        config_path = tmp_path / "config.json"
+        config_path.write_text('{"pooling_mode_cls_token": true}')
+        save_dir = tmp_path / "model"
+
+        with patch('src.embeddings.hf_hub_download', return_value=str(config_path)) as download:
+            assert onnx_provider._load_pooling("BAAI/bge-small-en-v1.5", save_dir) == "cls"
+            assert onnx_provider._load_pooling("BAAI/bge-small-en-v1.5", save_dir) == "cls"
+
+        download.assert_called_once_with("BAAI/bge-small-en-v1.5", "1_Pooling/config.json")
+
+    def test_model_without_pooling_config_is_mean_pooled(self, onnx_provider, tmp_path):
+        """Test that plain transformer models fall back to mean pooling."""
+        with patch('src.embeddings.hf_hub_download', side_effect=EntryNotFoundError("missing")):
+            assert onnx_provider._load_pooling("org/plain-model", tmp_path) == "mean"
+
+        assert (tmp_path / ONNXEmbedding.POOLING_CACHE_FILE).read_text() == "{}"
 
 
 class TestGetEmbeddingProvider:
@@ -203,29 +451,33 @@ class TestGetEmbeddingProvider:
     @patch('src.embeddings.SentenceTransformer')
     def test_get_local_provider_default(self, mock_transformer):
         """Test getting local provider by default."""
-        with patch.dict('os.environ', {}, clear=True):
-            provider = get_embedding_provider()
-            assert isinstance(provider, LocalEmbedding)
+        provider = get_embedding_provider()
+        assert isinstance(provider, LocalEmbedding)
 
     @patch('src.embeddings.SentenceTransformer')
-    def test_get_local_provider_explicit(self, mock_transformer):
+    def test_get_local_provider_explicit(self, mock_transformer, monkeypatch):
         """Test getting local provider explicitly."""
-        with patch.dict('os.environ', {'MEMALPHA_EMBEDDING_PROVIDER': 'local'}):
-            provider = get_embedding_provider()
-            assert isinstance(provider, LocalEmbedding)
+        monkeypatch.setenv('MEMALPHA_EMBEDDING_PROVIDER', 'local')
+        provider = get_embedding_provider()
+        assert isinstance(provider, LocalEmbedding)
 
-    def test_get_openai_provider(self):
+    def test_get_openai_provider(self, monkeypatch):
         """Test getting OpenAI provider."""
-        with patch.dict('os.environ', {
-            'MEMALPHA_EMBEDDING_PROVIDER': 'openai',
-            'MEMALPHA_OPENAI_API_KEY': 'sk-test'
-        }):
+        monkeypatch.setenv('MEMALPHA_EMBEDDING_PROVIDER', 'openai')
+        monkeypatch.setenv('MEMALPHA_OPENAI_API_KEY', 'sk-test')
+        provider = get_embedding_provider()
+        assert isinstance(provider, OpenAIEmbedding)
+
+    def test_get_onnx_provider(self, monkeypatch):
+        """Test getting ONNX provider."""
+        monkeypatch.setenv('MEMALPHA_EMBEDDING_PROVIDER', 'onnx')
+        with patch('src.embeddings.ORTModelForFeatureExtraction', Mock()):
             provider = get_embedding_provider()
-            assert isinstance(provider, OpenAIEmbedding)
+            assert isinstance(provider, ONNXEmbedding)
 
-    def test_invalid_provider_raises_error(self):
+    def test_invalid_provider_raises_error(self, monkeypatch):
         """Test that invalid provider name raises error."""
-        with patch.dict('os.environ', {'MEMALPHA_EMBEDDING_PROVIDER': 'invalid'}):
-            with pytest.raises(ValueError, match="Unknown embedding provider"):
-                get_embedding_provider()
+        monkeypatch.setenv('MEMALPHA_EMBEDDING_PROVIDER', 'invalid')
+        with pytest.raises(ValueError, match="Unknown embedding provider"):
+            get_embedding_provider()
 
@@ -1,47 +1,102 @@
 """Unit tests for memory store."""
 
 import pytest
+import numpy as np
 from unittest.mock import Mock, patch, MagicMock
 from datetime import datetime
+from types import MappingProxyType
+import chromadb
+from chromadb.errors import NotFoundError
 from src.memory_store import MemoryStore
 from src.models import MemoryCreate, MemoryUpdate, Memory
-from src.embeddings import LocalEmbedding
 
 
-@pytest.fixture
+# ChromaDB metadata of a stored memory, shared read-only by the mocked responses
+_CHROMA_METADATA = MappingProxyType({
+    'project_id': 'proj-1',
+    'agent_id': 'agent-1',
+    'custom_metadata': '{}',
+    'embedding_provider': 'local',
+    'embedding_model': 'test-model',
+    'created_at': '2025-01-01T00:00:00',
+    'updated_at': '2025-01-01T00:00:00'
+})
+
+
+class _StubEmbeddingProvider:
+    """Embedding provider stub exposing only what MemoryStore uses."""
+
+    provider_name = "local"
+    model_name = "test-model"
+    dimension = 384
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Replace the embed methods with fresh mocks."""
+        self.embed = MagicMock(return_value=[0.1, 0.2, 0.3, 0.4])
+        self.embed_batch = MagicMock(return_value=[[0.1, 0.2], [0.3, 0.4]])
+
+
+def _configure_chroma_client(mock_client, mock_collection):
+    """Point the mock client at a mock collection holding no memories."""
+    mock_collection.metadata = {"hnsw:space": "cosine"}
+    mock_collection.get.return_value = {'ids': [], 'documents': [], 'metadatas': []}
+    mock_collection.query.return_value = {
+        'ids': [[]], 'documents': [[]], 'metadatas': [[]], 'distances': [[]]
+    }
+    mock_client.get_or_create_collection.return_value = mock_collection
+    mock_client.get_collection.return_value = mock_collection
+
+
+@pytest.fixture(scope="module")
 def mock_embedding_provider():
-    """Create a mock embedding provider."""
-    provider = Mock(spec=LocalEmbedding)
-    provider.provider_name = "local"
-    provider.model_name = "test-model"
-    provider.dimension = 384
-    provider.embed.return_value = [0.1, 0.2, 0.3, 0.4]
-    provider.embed_batch.return_value = [[0.1, 0.2], [0.3, 0.4]]
-    return provider
+    """Create a mock embedding provider, shared by the module."""
+    return _StubEmbeddingProvider()
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def mock_chroma_client():
-    """Create a mock ChromaDB client."""
-    with patch('src.memory_store.chromadb.PersistentClient') as mock_client_class:
-        mock_client = Mock()
-        mock_collection = Mock()
-        mock_client.get_or_create_collection.return_value = mock_collection
-        mock_client_class.return_value = mock_client
-        yield mock_client, mock_collection
+    """Patch the ChromaDB client once for the module."""
+    patcher = patch.object(chromadb, 'PersistentClient')
+    mock_client_class = patcher.start()
+    mock_client = Mock()
+    mock_collection = Mock()
+    _configure_chroma_client(mock_client, mock_collection)
+    mock_client_class.return_value = mock_client
+    yield mock_client, mock_collection
+    patcher.stop()
+
+
+@pytest.fixture
+def mock_collection(mock_chroma_client):
+    """The mock collection every ChromaDB lookup returns."""
+    return mock_chroma_client[1]
+
+
+@pytest.fixture(autouse=True)
+def _reset_mocks(mock_embedding_provider, mock_chroma_client):
+    """Restore the shared mocks to their baseline after each test."""
+    yield
+    mock_client, mock_collection = mock_chroma_client
+    mock_embedding_provider.reset()
+    for mock in (mock_client, mock_collection):
+        mock.reset_mock(return_value=True, side_effect=True)
+    _configure_chroma_client(mock_client, mock_collection)
 
 
 class TestMemoryStoreInitialization:
     """Test MemoryStore initialization."""
 
-    @patch('src.memory_store.chromadb.PersistentClient')
+    @patch.object(chromadb, 'PersistentClient')
     def test_initialization_default_path(self, mock_client_class, mock_embedding_provider):
         """Test initialization with default data path."""
         store = MemoryStore(embedding_provider=mock_embedding_provider)
         assert store.embedding_provider == mock_embedding_provider
         mock_client_class.assert_called_once()
 
-    @patch('src.memory_store.chromadb.PersistentClient')
+    @patch.object(chromadb, 'PersistentClient')
     def test_initialization_custom_path(self, mock_client_class, mock_embedding_provider):
         """Test initialization with custom data path."""
         custom_path = "/tmp/test_chroma"
@@ -55,7 +110,7 @@ class TestMemoryStoreInitialization:
 class TestCollectionNaming:
     """Test collection name generation."""
 
-    @patch('src.memory_store.chromadb.PersistentClient')
+    @patch.object(chromadb, 'PersistentClient')
     def test_collection_name_format(self, mock_client_class, mock_embedding_provider):
         """Test collection name follows correct format."""
         mock_client = Mock()
@@ -66,7 +121,7 @@ class TestCollectionNaming:
         
         assert name == "p_my-project_a_agent-1_emb_local"
 
-    @patch('src.memory_store.chromadb.PersistentClient')
+    @patch.object(chromadb, 'PersistentClient')
     def test_collection_name_sanitization(self, mock_client_class, mock_embedding_provider):
         """Test collection name sanitizes special characters."""
         mock_client = Mock()
@@ -78,14 +133,128 @@ class TestCollectionNaming:
         
         # Should replace or remove special characters
         assert "@" not in name and "!" not in name and "#" not in name
+        assert name == "p_my_project__a_agent_1_emb_local"
+
+    @patch.object(chromadb, 'PersistentClient')
+    def test_collection_name_is_cached(self, mock_client_class, mock_embedding_provider):
+        """Test that repeated lookups return the same name."""
+        store = MemoryStore(embedding_provider=mock_embedding_provider)
+        first = store._get_collection_name("proj ü", "agent")
+
+        assert store._get_collection_name("proj ü", "agent") is first
+        assert first == "p_proj___a_agent_emb_local"
+
+    @patch.object(chromadb, 'PersistentClient')
+    def test_injected_client_and_prefix(self, mock_client_class, mock_embedding_provider):
+        """Test that a shared client is used as-is and names get the prefix."""
+        client = Mock()
+        store = MemoryStore(
+            embedding_provider=mock_embedding_provider,
+            client=client,
+            collection_prefix="t1_"
+        )
+        
+        assert store.client is client
+        mock_client_class.assert_not_called()
+        assert store._get_collection_name("proj", "agent") == "t1_p_proj_a_agent_emb_local"
+
+    def test_new_collections_use_cosine(self, mock_chroma_client, mock_embedding_provider):
+        """Test that collections are created with the cosine distance space."""
+        mock_client, _ = mock_chroma_client
+        mock_client.get_collection.side_effect = NotFoundError("missing")
+
+        store = MemoryStore(embedding_provider=mock_embedding_provider)
+        store._get_or_create_collection("proj-1", "agent-1")
+
+        metadata = mock_client.get_or_create_collection.call_args.kwargs["metadata"]
+        assert metadata["hnsw:space"] == "cosine"
+        assert metadata["normalized"] is True
+
+    def test_new_collections_tune_hnsw(self, mock_chroma_client, mock_embedding_provider):
+        """Test that collections are created with the HNSW graph settings."""
+        mock_client, _ = mock_chroma_client
+        mock_client.get_collection.side_effect = NotFoundError("missing")
+
+        store = MemoryStore(embedding_provider=mock_embedding_provider)
+        store._get_or_create_collection("proj-1", "agent-1")
+
+        metadata = mock_client.get_or_create_collection.call_args.kwargs["metadata"]
+        assert metadata["hnsw:M"] == 16
+        assert metadata["hnsw:construction_ef"] == 200
+        assert metadata["hnsw:search_ef"] == 100
+
+    def test_collection_handle_is_cached(self, mock_chroma_client, mock_embedding_provider):
+        """Test that ChromaDB is only asked once per project and agent."""
+        mock_client, mock_collection = mock_chroma_client
+
+        store = MemoryStore(embedding_provider=mock_embedding_provider)
+        first = store._get_or_create_collection("proj-1", "agent-1")
+        second = store._get_or_create_collection("proj-1", "agent-1")
+        store._get_or_create_collection("proj-1", "agent-2")
+
+        assert first is second is mock_collection
+        assert mock_client.get_collection.call_count == 2
+
+    def test_existing_collection_keeps_its_metadata(
+        self, mock_chroma_client, mock_embedding_provider
+    ):
+        """Test that creation metadata is never sent for an existing collection."""
+        mock_client, mock_collection = mock_chroma_client
+
+        store = MemoryStore(embedding_provider=mock_embedding_provider)
+
+        assert store._get_or_create_collection("proj-1", "agent-1") is mock_collection
+        mock_client.get_or_create_collection.assert_not_called()
+
+
+class TestMissingCollection:
+    """Test read-only operations on a project/agent with no stored memories."""
+
+    @pytest.fixture
+    def store(self, mock_chroma_client, mock_embedding_provider):
+        mock_client, _ = mock_chroma_client
+        mock_client.get_collection.side_effect = NotFoundError("missing")
+        return MemoryStore(embedding_provider=mock_embedding_provider)
+
+    def test_get_memory_returns_none(self, store, mock_chroma_client):
+        """Test that get_memory does not create a collection."""
+        mock_client, _ = mock_chroma_client
+        assert store.get_memory("proj", "agent", "mem-1") is None
+        mock_client.get_or_create_collection.assert_not_called()
+
+    def test_list_memories_returns_empty(self, store, mock_chroma_client):
+        """Test that list_memories does not create a collection."""
+        mock_client, _ = mock_chroma_client
+        assert store.list_memories("proj", "agent") == []
+        mock_client.get_or_create_collection.assert_not_called()
+
+    def test_count_memories_returns_zero(self, store, mock_chroma_client):
+        """Test that count_memories does not create a collection."""
+        mock_client, _ = mock_chroma_client
+        assert store.count_memories("proj", "agent") == 0
+        mock_client.get_or_create_collection.assert_not_called()
+
+    def test_delete_memory_returns_false(self, store, mock_chroma_client):
+        """Test that delete_memory reports nothing was deleted."""
+        mock_client, _ = mock_chroma_client
+        assert store.delete_memory("proj", "agent", "mem-1") is False
+        mock_client.get_or_create_collection.assert_not_called()
+
+    def test_collection_found_after_store(self, store, mock_chroma_client):
+        """Test that a collection created by a write is reused by reads."""
+        mock_client, mock_collection = mock_chroma_client
+        store.store_memory(MemoryCreate(project_id="proj", agent_id="agent", content="A"))
+        mock_client.get_collection.reset_mock()
+
+        assert store.list_memories("proj", "agent") == []
+        mock_client.get_collection.assert_not_called()
 
 
 class TestStoreMemory:
     """Test storing memories."""
 
-    def test_store_memory_success(self, mock_chroma_client, mock_embedding_provider):
+    def test_store_memory_success(self, mock_collection, mock_embedding_provider):
         """Test successfully storing a memory."""
-        mock_client, mock_collection = mock_chroma_client
         mock_collection.add = Mock()
 
         store = MemoryStore(embedding_provider=mock_embedding_provider)
@@ -108,10 +277,41 @@ class TestStoreMemory:
         mock_embedding_provider.embed.assert_called_once_with("Test memory")
         mock_collection.add.assert_called_once()
 
-    def test_store_memory_generates_unique_ids(self, mock_chroma_client, mock_embedding_provider):
+    def test_store_memory_chroma_metadata(self, mock_collection, mock_embedding_provider):
+        """Test that custom metadata is stored as a JSON string with one timestamp."""
+        store = MemoryStore(embedding_provider=mock_embedding_provider)
+        store.store_memory(MemoryCreate(
+            project_id="proj", agent_id="agent", content="Memory",
+            metadata={"tags": ["test"], "importance": 8}
+        ))
+
+        stored = mock_collection.add.call_args.kwargs["metadatas"][0]
+        assert isinstance(stored["custom_metadata"], str)
+        assert store._deserialize_metadata(stored["custom_metadata"]) == {
+            "tags": ["test"], "importance": 8
+        }
+        assert stored["created_at"] == stored["updated_at"]
+
+    def test_store_memory_normalizes_embeddings(self, mock_collection, mock_embedding_provider):
+        """Test that cosine collections store unit-length embeddings."""
+        store = MemoryStore(embedding_provider=mock_embedding_provider)
+        store.store_memory(MemoryCreate(project_id="proj", agent_id="agent", content="Memory"))
+
+        stored = np.asarray(mock_collection.add.call_args.kwargs["embeddings"])
+        np.testing.assert_allclose(np.linalg.norm(stored, axis=1), [1.0], rtol=1e-6)
+        np.testing.assert_allclose(stored[0] / stored[0][0], [1.0, 2.0, 3.0, 4.0], rtol=1e-6)
+
+    def test_store_memory_keeps_raw_embeddings_for_l2(self, mock_collection, mock_embedding_provider):
+        """Test that legacy L2 collections store embeddings unchanged."""
+        mock_collection.metadata = {"project_id": "proj"}
+
+        store = MemoryStore(embedding_provider=mock_embedding_provider)
+        store.store_memory(MemoryCreate(project_id="proj", agent_id="agent", content="Memory"))
+
+        assert mock_collection.add.call_args.kwargs["embeddings"] == [[0.1, 0.2, 0.3, 0.4]]
+
+    def test_store_memory_generates_unique_ids(self, mock_collection, mock_embedding_provider):
         """Test that each stored memory gets a unique ID."""
-        mock_client, mock_collection = mock_chroma_client
-        
         store = MemoryStore(embedding_provider=mock_embedding_provider)
         memory1 = store.store_memory(MemoryCreate(
             project_id="proj", agent_id="agent", content="Memory 1"
@@ -121,26 +321,129 @@ class TestStoreMemory:
         ))
 
         assert memory1.memory_id != memory2.memory_id
+        assert len(memory1.memory_id) == 32 and "-" not in memory1.memory_id
+
+
+class TestStoreMemories:
+    """Test storing memories in batches."""
+
+    def test_store_memories_single_batch(self, mock_collection, mock_embedding_provider):
+        """Test that one collection gets one embed_batch and one add call."""
+        store = MemoryStore(embedding_provider=mock_embedding_provider)
+        memories = store.store_memories([
+            MemoryCreate(project_id="proj", agent_id="agent", content="Memory 1"),
+            MemoryCreate(project_id="proj", agent_id="agent", content="Memory 2"),
+        ])
+
+        assert [m.content for m in memories] == ["Memory 1", "Memory 2"]
+        assert memories[0].memory_id != memories[1].memory_id
+        mock_embedding_provider.embed_batch.assert_called_once_with(["Memory 1", "Memory 2"])
+        mock_embedding_provider.embed.assert_not_called()
+        mock_collection.add.assert_called_once()
+        add_kwargs = mock_collection.add.call_args.kwargs
+        assert add_kwargs["documents"] == ["Memory 1", "Memory 2"]
+        assert add_kwargs["ids"] == [m.memory_id for m in memories]
+
+    def test_store_memories_groups_by_collection(self, mock_collection, mock_embedding_provider):
+        """Test that requests are grouped per project/agent and order is preserved."""
+        store = MemoryStore(embedding_provider=mock_embedding_provider)
+        memories = store.store_memories([
+            MemoryCreate(project_id="proj", agent_id="agent-1", content="A"),
+            MemoryCreate(project_id="proj", agent_id="agent-2", content="B"),
+            MemoryCreate(project_id="proj", agent_id="agent-1", content="C"),
+        ])
+
+        assert [m.content for m in memories] == ["A", "B", "C"]
+        assert [m.agent_id for m in memories] == ["agent-1", "agent-2", "agent-1"]
+        batches = [c.args[0] for c in mock_embedding_provider.embed_batch.call_args_list]
+        assert batches == [["A", "C"], ["B"]]
+        assert mock_collection.add.call_count == 2
+
+    def test_store_memories_precomputed_embeddings(self, mock_collection, mock_embedding_provider):
+        """Test that precomputed embeddings are stored without calling the provider."""
+        mock_collection.metadata = {"hnsw:space": "l2"}
+        
+        store = MemoryStore(embedding_provider=mock_embedding_provider)
+        store.store_memories([
+            MemoryCreate(project_id="proj", agent_id="agent-1", content="A"),
+            MemoryCreate(project_id="proj", agent_id="agent-2", content="B"),
+            MemoryCreate(project_id="proj", agent_id="agent-1", content="C"),
+        ], embeddings=[[1.0, 0.0], [2.0, 0.0], [3.0, 0.0]])
+        
+        mock_embedding_provider.embed_batch.assert_not_called()
+        stored = [c.kwargs["embeddings"].tolist() for c in mock_collection.add.call_args_list]
+        assert stored == [[[1.0, 0.0], [3.0, 0.0]], [[2.0, 0.0]]]
+
+    def test_store_memories_empty(self, mock_collection, mock_embedding_provider):
+        """Test that an empty batch is a no-op."""
+        store = MemoryStore(embedding_provider=mock_embedding_provider)
+
+        assert store.store_memories([]) == []
+        mock_embedding_provider.embed_batch.assert_not_called()
+        mock_collection.add.assert_not_called()
+
+
+class TestAsyncWrites:
+    """Test batching store_memory calls through the background writer."""
+
+    def test_store_memory_is_queued_and_batched(self, mock_collection, mock_embedding_provider):
+        """Test that queued memories are written with one embed and one add."""
+        mock_embedding_provider.embed_batch.return_value = [[0.1, 0.2]] * 3
+
+        with MemoryStore(
+            embedding_provider=mock_embedding_provider,
+            async_writes=True, batch_size=3, flush_ms=5000
+        ) as store:
+            memories = [
+                store.store_memory(MemoryCreate(
+                    project_id="proj", agent_id="agent", content=f"Memory {i}"
+                ))
+                for i in range(3)
+            ]
+            store.flush()
+
+            mock_embedding_provider.embed.assert_not_called()
+            mock_embedding_provider.embed_batch.assert_called_once_with(
+                ["Memory 0", "Memory 1", "Memory 2"]
+            )
+            add_kwargs = mock_collection.add.call_args.kwargs
+            assert add_kwargs["ids"] == [m.memory_id for m in memories]
+
+    def test_partial_batch_is_written_after_flush_ms(self, mock_collection, mock_embedding_provider):
+        """Test that a batch that never fills is still written."""
+        store = MemoryStore(
+            embedding_provider=mock_embedding_provider,
+            async_writes=True, batch_size=64, flush_ms=10
+        )
+        store.store_memory(MemoryCreate(project_id="proj", agent_id="agent", content="A"))
+        store.flush()
+
+        mock_collection.add.assert_called_once()
+        store.close()
+        assert store._writer is None
+
+    def test_failed_write_does_not_block_flush(self, mock_collection, mock_embedding_provider):
+        """Test that write errors are logged and flush still returns."""
+        mock_collection.add.side_effect = RuntimeError("disk full")
+
+        with MemoryStore(
+            embedding_provider=mock_embedding_provider, async_writes=True, flush_ms=10
+        ) as store:
+            store.store_memory(MemoryCreate(project_id="proj", agent_id="agent", content="A"))
+            store.flush()
+
+        mock_collection.add.assert_called_once()
 
 
 class TestGetMemory:
     """Test retrieving memories by ID."""
 
-    def test_get_memory_success(self, mock_chroma_client, mock_embedding_provider):
+    def test_get_memory_success(self, mock_collection, mock_embedding_provider):
         """Test successfully retrieving a memory."""
-        mock_client, mock_collection = mock_chroma_client
         mock_collection.get.return_value = {
             'ids': ['mem-123'],
             'documents': ['Test memory'],
-            'metadatas': [{
-                'project_id': 'proj-1',
-                'agent_id': 'agent-1',
-                'custom_metadata': '{"tags": ["test"]}',
-                'embedding_provider': 'local',
-                'embedding_model': 'test-model',
-                'created_at': '2025-01-01T00:00:00',
-                'updated_at': '2025-01-01T00:00:00'
-            }]
+            'metadatas': [{**_CHROMA_METADATA, 'custom_metadata': '{"tags": ["test"]}'}]
         }
 
         store = MemoryStore(embedding_provider=mock_embedding_provider)
@@ -151,15 +454,8 @@ class TestGetMemory:
         assert memory.content == "Test memory"
         assert memory.project_id == "proj-1"
 
-    def test_get_memory_not_found(self, mock_chroma_client, mock_embedding_provider):
+    def test_get_memory_not_found(self, mock_collection, mock_embedding_provider):
         """Test getting a non-existent memory returns None."""
-        mock_client, mock_collection = mock_chroma_client
-        mock_collection.get.return_value = {
-            'ids': [],
-            'documents': [],
-            'metadatas': []
-        }
-
         store = MemoryStore(embedding_provider=mock_embedding_provider)
         memory = store.get_memory("proj-1", "agent-1", "nonexistent")
 
@@ -169,32 +465,12 @@ class TestGetMemory:
 class TestSearchMemories:
     """Test searching memories."""
 
-    def test_search_memories_success(self, mock_chroma_client, mock_embedding_provider):
+    def test_search_memories_success(self, mock_collection, mock_embedding_provider):
         """Test successfully searching memories."""
-        mock_client, mock_collection = mock_chroma_client
         mock_collection.query.return_value = {
             'ids': [['mem-1', 'mem-2']],
             'documents': [['Memory 1', 'Memory 2']],
-            'metadatas': [[
-                {
-                    'project_id': 'proj-1',
-                    'agent_id': 'agent-1',
-                    'custom_metadata': '{}',
-                    'embedding_provider': 'local',
-                    'embedding_model': 'test-model',
-                    'created_at': '2025-01-01T00:00:00',
-                    'updated_at': '2025-01-01T00:00:00'
-                },
-                {
-                    'project_id': 'proj-1',
-                    'agent_id': 'agent-1',
-                    'custom_metadata': '{}',
-                    'embedding_provider': 'local',
-                    'embedding_model': 'test-model',
-                    'created_at': '2025-01-01T00:00:00',
-                    'updated_at': '2025-01-01T00:00:00'
-                }
-            ]],
+            'metadatas': [[_CHROMA_METADATA, _CHROMA_METADATA]],
             'distances': [[0.1, 0.3]]
         }
 
@@ -205,18 +481,37 @@ class TestSearchMemories:
         assert results[0].memory.content == "Memory 1"
         assert results[1].memory.content == "Memory 2"
         assert 0.0 <= results[0].similarity_score <= 1.0
+        assert results[0].similarity_score == pytest.approx(0.9)
+        assert results[1].similarity_score == pytest.approx(0.7)
+        assert results[0].memory.created_at == datetime(2025, 1, 1)
         mock_embedding_provider.embed.assert_called_once_with("search query")
 
-    def test_search_with_filters(self, mock_chroma_client, mock_embedding_provider):
-        """Test searching with metadata filters."""
-        mock_client, mock_collection = mock_chroma_client
+    def test_search_legacy_l2_collection(self, mock_collection, mock_embedding_provider):
+        """Test that collections without a cosine space keep the L2 score formula."""
+        mock_collection.metadata = {"project_id": "proj-1"}
         mock_collection.query.return_value = {
-            'ids': [[]],
-            'documents': [[]],
-            'metadatas': [[]],
-            'distances': [[]]
+            'ids': [['mem-1']],
+            'documents': [['Memory 1']],
+            'metadatas': [[_CHROMA_METADATA]],
+            'distances': [[0.1]]
         }
 
+        store = MemoryStore(embedding_provider=mock_embedding_provider)
+        results = store.search_memories("proj-1", "agent-1", "search query")
+
+        assert results[0].similarity_score == pytest.approx(1.0 / 1.1)
+
+    def test_repeated_search_embeds_query_once(self, mock_collection, mock_embedding_provider):
+        """Test that identical queries reuse the cached query embedding."""
+        store = MemoryStore(embedding_provider=mock_embedding_provider)
+        store.search_memories("proj-1", "agent-1", "search query")
+        store.search_memories("proj-1", "agent-1", "search query")
+
+        mock_embedding_provider.embed.assert_called_once_with("search query")
+        assert mock_collection.query.call_count == 2
+
+    def test_search_with_filters(self, mock_collection, mock_embedding_provider):
+        """Test searching with metadata filters."""
         store = MemoryStore(embedding_provider=mock_embedding_provider)
         filters = {"importance": {"$gte": 5}}
         results = store.search_memories(
@@ -229,25 +524,114 @@ class TestSearchMemories:
         assert call_args is not None
 
 
+class TestQuantizedSearch:
+    """Test searching through a quantized index."""
+
+    @staticmethod
+    def _fake_get(rows):
+        """Build a collection.get side effect serving the given rows."""
+        def get(ids=None, include=None):
+            selected = [r for r in rows if ids is None or r[0] in ids]
+            return {
+                'ids': [r[0] for r in selected],
+                'embeddings': [r[1] for r in selected],
+                'documents': [r[2] for r in selected],
+                'metadatas': [_CHROMA_METADATA for _ in selected]
+            }
+        return get
+
+    @patch.object(chromadb, 'PersistentClient')
+    def test_invalid_quantization_raises_error(self, mock_client_class, mock_embedding_provider):
+        """Test that an unknown quantization mode is rejected."""
+        with pytest.raises(ValueError, match="Unknown quantization mode"):
+            MemoryStore(embedding_provider=mock_embedding_provider, quantization="int3")
+
+    @patch.object(chromadb, 'PersistentClient')
+    def test_quantization_from_environment(
+        self, mock_client_class, mock_embedding_provider, monkeypatch
+    ):
+        """Test that MEMALPHA_QUANTIZE selects the quantization mode."""
+        monkeypatch.setenv('MEMALPHA_QUANTIZE', 'int8')
+        store = MemoryStore(embedding_provider=mock_embedding_provider)
+        assert store.quantization == "int8"
+
+    @pytest.mark.parametrize("quantization", ["fp32", "fp16", "int8", "binary"])
+    def test_search_uses_index_and_reranks(
+        self, mock_chroma_client, mock_embedding_provider, quantization
+    ):
+        """Test that quantized search bypasses collection.query and ranks exactly."""
+        mock_client, mock_collection = mock_chroma_client
+        mock_collection.get.side_effect = self._fake_get([
+            ('mem-1', [0.0, 1.0, 0.0, 0.0], 'Far memory'),
+            ('mem-2', [0.1, 0.2, 0.3, 0.4], 'Exact memory'),
+            ('mem-3', [0.1, 0.2, 0.3, 0.5], 'Close memory'),
+        ])
+
+        store = MemoryStore(
+            embedding_provider=mock_embedding_provider, quantization=quantization
+        )
+        results = store.search_memories("proj-1", "agent-1", "search query", limit=2)
+
+        assert [r.memory.content for r in results] == ["Exact memory", "Close memory"]
+        assert results[0].similarity_score == pytest.approx(1.0)
+        mock_collection.query.assert_not_called()
+
+    def test_fp32_index_fetches_only_results(self, mock_collection, mock_embedding_provider):
+        """Test that an exact index fetches just the top rows, without embeddings."""
+        mock_collection.get.side_effect = self._fake_get([
+            ('mem-1', [0.0, 1.0, 0.0, 0.0], 'Far memory'),
+            ('mem-2', [0.1, 0.2, 0.3, 0.4], 'Exact memory'),
+            ('mem-3', [0.1, 0.2, 0.3, 0.5], 'Close memory'),
+        ])
+
+        store = MemoryStore(embedding_provider=mock_embedding_provider, quantization="fp32")
+        results = store.search_memories("proj-1", "agent-1", "search query", limit=2)
+
+        assert [r.memory.content for r in results] == ["Exact memory", "Close memory"]
+        assert results[0].similarity_score == pytest.approx(1.0)
+        assert results[1].similarity_score == pytest.approx(0.99, abs=0.01)
+        last_get = mock_collection.get.call_args.kwargs
+        assert sorted(last_get["ids"]) == ["mem-2", "mem-3"]
+        assert "embeddings" not in last_get["include"]
+
+    def test_index_tracks_stores_and_deletes(self, mock_collection, mock_embedding_provider):
+        """Test that a loaded index sees later stores and deletes."""
+        rows = [('mem-1', [0.0, 1.0, 0.0, 0.0], 'Far memory')]
+        mock_collection.get.side_effect = self._fake_get(rows)
+
+        store = MemoryStore(embedding_provider=mock_embedding_provider, quantization="int8")
+        store.search_memories("proj-1", "agent-1", "warm up", limit=1)
+        
+        memory = store.store_memory(MemoryCreate(
+            project_id="proj-1", agent_id="agent-1", content="New memory"
+        ))
+        rows.append((memory.memory_id, [0.1, 0.2, 0.3, 0.4], 'New memory'))
+        results = store.search_memories("proj-1", "agent-1", "query", limit=1)
+        assert results[0].memory.memory_id == memory.memory_id
+
+        store.delete_memory("proj-1", "agent-1", memory.memory_id)
+        rows.pop()
+        results = store.search_memories("proj-1", "agent-1", "query", limit=1)
+        assert results[0].memory.memory_id == "mem-1"
+
+    def test_search_with_filters_uses_chromadb(self, mock_collection, mock_embedding_provider):
+        """Test that filtered searches fall back to collection.query."""
+        store = MemoryStore(embedding_provider=mock_embedding_provider, quantization="int8")
+        store.search_memories("proj-1", "agent-1", "query", filters={"category": "fact"})
+
+        mock_collection.query.assert_called_once()
+
+
 class TestUpdateMemory:
     """Test updating memories."""
 
-    def test_update_content(self, mock_chroma_client, mock_embedding_provider):
+    def test_update_content(self, mock_collection, mock_embedding_provider):
         """Test updating memory content."""
-        mock_client, mock_collection = mock_chroma_client
         # Mock get to return existing memory
         mock_collection.get.return_value = {
             'ids': ['mem-123'],
             'documents': ['Old content'],
-            'metadatas': [{
-                'project_id': 'proj-1',
-                'agent_id': 'agent-1',
-                'custom_metadata': '{}',
-                'embedding_provider': 'local',
-                'embedding_model': 'test-model',
-                'created_at': '2025-01-01T00:00:00',
-                'updated_at': '2025-01-01T00:00:00'
-            }]
+            'metadatas': [_CHROMA_METADATA]
         }
 
         store = MemoryStore(embedding_provider=mock_embedding_provider)
@@ -259,21 +643,12 @@ class TestUpdateMemory:
         # Should re-embed when content changes
         assert mock_embedding_provider.embed.call_count >= 1
 
-    def test_update_metadata_only(self, mock_chroma_client, mock_embedding_provider):
+    def test_update_metadata_only(self, mock_collection, mock_embedding_provider):
         """Test updating only metadata."""
-        mock_client, mock_collection = mock_chroma_client
         mock_collection.get.return_value = {
             'ids': ['mem-123'],
             'documents': ['Content'],
-            'metadatas': [{
-                'project_id': 'proj-1',
-                'agent_id': 'agent-1',
-                'custom_metadata': '{"old": "data"}',
-                'embedding_provider': 'local',
-                'embedding_model': 'test-model',
-                'created_at': '2025-01-01T00:00:00',
-                'updated_at': '2025-01-01T00:00:00'
-            }]
+            'metadatas': [{**_CHROMA_METADATA, 'custom_metadata': '{"old": "data"}'}]
         }
 
         store = MemoryStore(embedding_provider=mock_embedding_provider)
@@ -284,13 +659,29 @@ class TestUpdateMemory:
         # Should not re-embed when only metadata changes
         mock_embedding_provider.embed.assert_not_called()
 
+    def test_update_same_content_skips_embedding(self, mock_collection, mock_embedding_provider):
+        """Test that passing unchanged content does not re-embed."""
+        mock_collection.get.return_value = {
+            'ids': ['mem-123'],
+            'documents': ['Content'],
+            'metadatas': [_CHROMA_METADATA]
+        }
+
+        store = MemoryStore(embedding_provider=mock_embedding_provider)
+        update = MemoryUpdate(content="Content", metadata={"new": "data"})
+        updated = store.update_memory("proj-1", "agent-1", "mem-123", update)
+
+        assert updated.content == "Content"
+        assert updated.metadata == {"new": "data"}
+        mock_embedding_provider.embed.assert_not_called()
+        assert "embeddings" not in mock_collection.update.call_args.kwargs
+
 
 class TestDeleteMemory:
     """Test deleting memories."""
 
-    def test_delete_memory_success(self, mock_chroma_client, mock_embedding_provider):
+    def test_delete_memory_success(self, mock_collection, mock_embedding_provider):
         """Test successfully deleting a memory."""
-        mock_client, mock_collection = mock_chroma_client
         mock_collection.delete = Mock()
 
         store = MemoryStore(embedding_provider=mock_embedding_provider)
@@ -303,32 +694,12 @@ class TestDeleteMemory:
 class TestListMemories:
     """Test listing memories."""
 
-    def test_list_memories(self, mock_chroma_client, mock_embedding_provider):
+    def test_list_memories(self, mock_collection, mock_embedding_provider):
         """Test listing memories with pagination."""
-        mock_client, mock_collection = mock_chroma_client
         mock_collection.get.return_value = {
             'ids': ['mem-1', 'mem-2'],
             'documents': ['Content 1', 'Content 2'],
-            'metadatas': [
-                {
-                    'project_id': 'proj-1',
-                    'agent_id': 'agent-1',
-                    'custom_metadata': '{}',
-                    'embedding_provider': 'local',
-                    'embedding_model': 'test-model',
-                    'created_at': '2025-01-01T00:00:00',
-                    'updated_at': '2025-01-01T00:00:00'
-                },
-                {
-                    'project_id': 'proj-1',
-                    'agent_id': 'agent-1',
-                    'custom_metadata': '{}',
-                    'embedding_provider': 'local',
-                    'embedding_model': 'test-model',
-                    'created_at': '2025-01-01T00:00:00',
-                    'updated_at': '2025-01-01T00:00:00'
-                }
-            ]
+            'metadatas': [_CHROMA_METADATA, _CHROMA_METADATA]
         }
 
         store = MemoryStore(embedding_provider=mock_embedding_provider)
@@ -337,4 +708,66 @@ class TestListMemories:
         assert len(metadatas) == 2
         assert metadatas[0].memory_id == "mem-1"
         assert metadatas[1].memory_id == "mem-2"
+        assert metadatas[0].metadata == {}
+        assert metadatas[0].created_at == datetime(2025, 1, 1)
+        # Shared timestamps are parsed once
+        assert metadatas[1].created_at is metadatas[0].created_at
+
+    def test_count_memories(self, mock_collection, mock_embedding_provider):
+        """Test that counting uses the collection's counter instead of fetching rows."""
+        mock_collection.count.return_value = 3
+
+        store = MemoryStore(embedding_provider=mock_embedding_provider)
+
+        assert store.count_memories("proj-1", "agent-1") == 3
+        mock_collection.get.assert_not_called()
+
+
+class TestMemoryStoreRoundTrip:
+    """Test MemoryStore against a real in-memory ChromaDB."""
+
+    def test_stored_memories_read_back(self, memory_store):
+        """Test that batched memories can be fetched, listed and counted."""
+        stored = memory_store.store_memories([
+            MemoryCreate(project_id="proj-1", agent_id="agent-1", content=content,
+                         metadata={"category": "fact", "tags": [content]})
+            for content in ["First fact", "Second fact"]
+        ])
+
+        memory = memory_store.get_memory("proj-1", "agent-1", stored[1].memory_id)
+        assert memory.content == "Second fact"
+        assert memory.metadata == {"category": "fact", "tags": ["Second fact"]}
+        assert memory_store.count_memories("proj-1", "agent-1") == 2
+        listed = memory_store.list_memories("proj-1", "agent-1")
+        assert {m.memory_id for m in listed} == {m.memory_id for m in stored}
+
+    def test_repeated_search_finds_memory(self, memory_store):
+        """Test that searches, including cached query embeddings, find stored memories."""
+        memory = memory_store.store_memory(MemoryCreate(
+            project_id="proj-1", agent_id="agent-1", content="Uses PostgreSQL 15"
+        ))
+
+        for _ in range(2):
+            results = memory_store.search_memories("proj-1", "agent-1", "which database")
+            assert [r.memory.memory_id for r in results] == [memory.memory_id]
+            assert results[0].similarity_score == pytest.approx(1.0, abs=1e-5)
+
+    def test_legacy_l2_collection_keeps_its_space(self, memory_store):
+        """Test that writing to a pre-cosine collection neither relabels nor breaks it."""
+        legacy = memory_store.client.create_collection(
+            name=memory_store._get_collection_name("proj-1", "agent-1"),
+            metadata={"project_id": "proj-1", "agent_id": "agent-1"}
+        )
 
+        with patch.object(memory_store.client, "get_or_create_collection") as create:
+            memory = memory_store.store_memory(MemoryCreate(
+                project_id="proj-1", agent_id="agent-1", content="Uses PostgreSQL 15"
+            ))
+        create.assert_not_called()
+
+        metadata = memory_store.client.get_collection(legacy.name).metadata
+        assert "hnsw:space" not in metadata
+        assert "normalized" not in metadata
+        results = memory_store.search_memories("proj-1", "agent-1", "which database")
+        assert [r.memory.memory_id for r in results] == [memory.memory_id]
+        assert results[0].similarity_score == pytest.approx(1.0, abs=1e-5)
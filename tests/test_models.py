@@ -36,30 +36,17 @@ class TestMemoryCreate:
         )
         assert memory.metadata == metadata
 
-    def test_create_empty_content_fails(self):
-        """Test that empty content raises validation error."""
+    @pytest.mark.parametrize("fields", [
+        pytest.param(dict(project_id="test", agent_id="test", content=""), id="empty-content"),
+        pytest.param(dict(agent_id="test", content="test content"), id="missing-project-id"),
+        pytest.param(dict(project_id="test", content="test content"), id="missing-agent-id"),
+        pytest.param(dict(project_id="test", agent_id="test", content="   "), id="blank-content"),
+        pytest.param(dict(project_id="", agent_id="test", content="test content"), id="empty-project-id"),
+    ])
+    def test_create_invalid_fails(self, fields):
+        """Test that blank content or a missing or empty ID raises validation error."""
         with pytest.raises(ValidationError):
-            MemoryCreate(
-                project_id="test",
-                agent_id="test",
-                content=""
-            )
-
-    def test_create_missing_project_id_fails(self):
-        """Test that missing project_id raises validation error."""
-        with pytest.raises(ValidationError):
-            MemoryCreate(
-                agent_id="test",
-                content="test content"
-            )
-
-    def test_create_missing_agent_id_fails(self):
-        """Test that missing agent_id raises validation error."""
-        with pytest.raises(ValidationError):
-            MemoryCreate(
-                project_id="test",
-                content="test content"
-            )
+            MemoryCreate(**fields)
 
 
 class TestMemory:
@@ -99,6 +86,19 @@ class TestMemory:
         assert isinstance(memory.created_at, datetime)
         assert isinstance(memory.updated_at, datetime)
 
+    def test_constructed_memory_timestamps_auto_generated(self):
+        """Test that model_construct, used for rows read back from the store, fills timestamps."""
+        memory = Memory.model_construct(
+            memory_id="mem-123",
+            project_id="proj-1",
+            agent_id="agent-1",
+            content="Test",
+            embedding_provider="local",
+            embedding_model="all-MiniLM-L6-v2"
+        )
+        assert isinstance(memory.created_at, datetime)
+        assert isinstance(memory.updated_at, datetime)
+
 
 class TestMemoryUpdate:
     """Test MemoryUpdate model."""
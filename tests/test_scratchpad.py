@@ -1,14 +1,29 @@
 """Unit tests for scratchpad functionality."""
 
+import os
 import pytest
 import json
-import tempfile
-from pathlib import Path
+from unittest.mock import patch
 from datetime import datetime
 from pydantic import ValidationError
 
 from src.models import ScratchpadCreate, ScratchpadUpdate, Scratchpad
-from src.scratchpad_store import ScratchpadStore
+from src.scratchpad_store import INDEX_FILENAME, ScratchpadStore
+
+
+@pytest.fixture(scope="class")
+def seeded_store(tmp_path_factory):
+    """Store with three scratchpads, written once and only read by the tests."""
+    store = ScratchpadStore(data_path=str(tmp_path_factory.mktemp("scratchpads")))
+    for project_id, agent_id, content in [
+        ("proj-1", "agent-1", "Scratch 1"),
+        ("proj-1", "agent-2", "Scratch 2"),
+        ("proj-2", "agent-1", "Scratch 3"),
+    ]:
+        store.create_scratchpad(ScratchpadCreate(
+            project_id=project_id, agent_id=agent_id, content=content
+        ))
+    return store
 
 
 class TestScratchpadModels:
@@ -74,19 +89,16 @@ class TestScratchpadStore:
     """Test scratchpad storage operations."""
 
     @pytest.fixture
-    def temp_store_dir(self):
-        """Create a temporary directory for scratchpad storage."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            yield tmpdir
-
-    @pytest.fixture
-    def scratchpad_store(self, temp_store_dir):
-        """Create a scratchpad store with temporary directory."""
-        return ScratchpadStore(data_path=temp_store_dir)
+    def scratchpad_store(self, tmp_path):
+        """Create an empty scratchpad store for a test that writes to it.
+        
+        Read-only tests share the class-scoped seeded_store instead.
+        """
+        return ScratchpadStore(data_path=str(tmp_path))
 
-    def test_store_initialization(self, temp_store_dir):
+    def test_store_initialization(self, tmp_path):
         """Test that store creates necessary directories."""
-        store = ScratchpadStore(data_path=temp_store_dir)
+        store = ScratchpadStore(data_path=str(tmp_path))
         assert store.data_path.exists()
         assert store.data_path.is_dir()
 
@@ -189,61 +201,19 @@ class TestScratchpadStore:
         result = scratchpad_store.delete_scratchpad("nonexistent", "agent")
         assert result is False
 
-    def test_list_scratchpads(self, scratchpad_store):
-        """Test listing all scratchpads."""
-        # Create multiple scratchpads
-        scratchpad_store.create_scratchpad(ScratchpadCreate(
-            project_id="proj-1", agent_id="agent-1", content="Scratch 1"
-        ))
-        scratchpad_store.create_scratchpad(ScratchpadCreate(
-            project_id="proj-1", agent_id="agent-2", content="Scratch 2"
-        ))
-        scratchpad_store.create_scratchpad(ScratchpadCreate(
-            project_id="proj-2", agent_id="agent-1", content="Scratch 3"
-        ))
-        
-        # List all
-        all_scratchpads = scratchpad_store.list_scratchpads()
-        assert len(all_scratchpads) == 3
-
-    def test_list_scratchpads_by_project(self, scratchpad_store):
-        """Test listing scratchpads filtered by project."""
-        # Create multiple scratchpads
-        scratchpad_store.create_scratchpad(ScratchpadCreate(
-            project_id="proj-1", agent_id="agent-1", content="Scratch 1"
-        ))
-        scratchpad_store.create_scratchpad(ScratchpadCreate(
-            project_id="proj-1", agent_id="agent-2", content="Scratch 2"
-        ))
-        scratchpad_store.create_scratchpad(ScratchpadCreate(
-            project_id="proj-2", agent_id="agent-1", content="Scratch 3"
-        ))
-        
-        # List by project
-        proj1_scratchpads = scratchpad_store.list_scratchpads(project_id="proj-1")
-        assert len(proj1_scratchpads) == 2
-
-    def test_list_scratchpads_by_agent(self, scratchpad_store):
-        """Test listing scratchpads filtered by agent."""
-        # Create multiple scratchpads
-        scratchpad_store.create_scratchpad(ScratchpadCreate(
-            project_id="proj-1", agent_id="agent-1", content="Scratch 1"
-        ))
-        scratchpad_store.create_scratchpad(ScratchpadCreate(
-            project_id="proj-1", agent_id="agent-2", content="Scratch 2"
-        ))
-        scratchpad_store.create_scratchpad(ScratchpadCreate(
-            project_id="proj-2", agent_id="agent-1", content="Scratch 3"
-        ))
-        
-        # List by agent
-        agent1_scratchpads = scratchpad_store.list_scratchpads(agent_id="agent-1")
-        assert len(agent1_scratchpads) == 2
+    @pytest.mark.parametrize("filters, expected", [
+        ({}, 3),
+        ({"project_id": "proj-1"}, 2),
+        ({"agent_id": "agent-1"}, 2),
+    ])
+    def test_list_scratchpads(self, seeded_store, filters, expected):
+        """Test listing all scratchpads and filtering by project or agent."""
+        assert len(seeded_store.list_scratchpads(**filters)) == expected
 
-    def test_scratchpad_persistence(self, temp_store_dir):
+    def test_scratchpad_persistence(self, tmp_path):
         """Test that scratchpads persist across store instances."""
         # Create scratchpad in first store instance
-        store1 = ScratchpadStore(data_path=temp_store_dir)
+        store1 = ScratchpadStore(data_path=str(tmp_path))
         create = ScratchpadCreate(
             project_id="proj-1",
             agent_id="agent-1",
@@ -252,12 +222,105 @@ class TestScratchpadStore:
         store1.create_scratchpad(create)
         
         # Create new store instance and retrieve
-        store2 = ScratchpadStore(data_path=temp_store_dir)
+        store2 = ScratchpadStore(data_path=str(tmp_path))
         retrieved = store2.get_scratchpad("proj-1", "agent-1")
         
         assert retrieved is not None
         assert retrieved.content == "Persistent content"
 
+    def test_saved_file_is_readable_json(self, scratchpad_store):
+        """Test that scratchpads are written as indented UTF-8 JSON."""
+        scratchpad_store.create_scratchpad(ScratchpadCreate(
+            project_id="proj-1", agent_id="agent-1", content="Notizen: Größe ✓"
+        ))
+        filepath = scratchpad_store._get_filepath("proj-1", "agent-1")
+
+        data = json.loads(filepath.read_text(encoding="utf-8"))
+        assert data["content"] == "Notizen: Größe ✓"
+        assert "\n  " in filepath.read_text(encoding="utf-8")
+        assert not list(scratchpad_store.data_path.glob("*.tmp"))
+
+    def test_writes_use_unique_temporary_files(self, scratchpad_store):
+        """Test that two writes of one file never share a temporary file."""
+        filepath = scratchpad_store.data_path / INDEX_FILENAME
+        with patch("src.scratchpad_store.os.replace", wraps=os.replace) as replace:
+            scratchpad_store._write_atomic(filepath, b"[]")
+            scratchpad_store._write_atomic(filepath, b"[]")
+
+        first, second = (call.args[0] for call in replace.call_args_list)
+        assert first != second
+        assert os.path.dirname(first) == str(scratchpad_store.data_path)
+        assert not list(scratchpad_store.data_path.glob("*.tmp"))
+
+    def test_corrupt_file_is_skipped(self, scratchpad_store):
+        """Test that unreadable files are treated as missing."""
+        filepath = scratchpad_store._get_filepath("proj-1", "agent-1")
+        filepath.write_text("{not json", encoding="utf-8")
+
+        assert scratchpad_store.get_scratchpad("proj-1", "agent-1") is None
+        assert scratchpad_store.list_scratchpads() == []
+
+    def test_list_scratchpads_only_loads_matching_files(self, seeded_store):
+        """Test that filters are applied on the index before files are read."""
+        with patch.object(
+            seeded_store, "_load_scratchpad", wraps=seeded_store._load_scratchpad
+        ) as load:
+            scratchpads = seeded_store.list_scratchpads(project_id="proj-2")
+
+        assert [s.content for s in scratchpads] == ["Scratch 3"]
+        load.assert_called_once()
+
+    def test_index_survives_restart(self, tmp_path):
+        """Test that the index is persisted and reflects deletes."""
+        store1 = ScratchpadStore(data_path=str(tmp_path))
+        for agent in ["agent-1", "agent-2"]:
+            store1.create_scratchpad(ScratchpadCreate(
+                project_id="proj-1", agent_id=agent, content="x"
+            ))
+        store1.delete_scratchpad("proj-1", "agent-1")
+
+        store2 = ScratchpadStore(data_path=str(tmp_path))
+        assert [s.agent_id for s in store2.list_scratchpads()] == ["agent-2"]
+
+    def test_index_rebuilt_when_missing(self, tmp_path):
+        """Test that scratchpads written without an index are still listed."""
+        store1 = ScratchpadStore(data_path=str(tmp_path))
+        store1.create_scratchpad(ScratchpadCreate(
+            project_id="proj-1", agent_id="agent-1", content="x"
+        ))
+        (tmp_path / INDEX_FILENAME).unlink()
+
+        store2 = ScratchpadStore(data_path=str(tmp_path))
+        assert [s.project_id for s in store2.list_scratchpads()] == ["proj-1"]
+        assert (tmp_path / INDEX_FILENAME).exists()
+
+    def test_incomplete_index_entries_are_dropped(self, tmp_path):
+        """Test that index entries missing a field are rebuilt from the files."""
+        store1 = ScratchpadStore(data_path=str(tmp_path))
+        store1.create_scratchpad(ScratchpadCreate(
+            project_id="proj-1", agent_id="agent-1", content="x"
+        ))
+        (tmp_path / INDEX_FILENAME).write_bytes(
+            b'[{"project_id": "proj-1", "agent_id": "agent-1"}]'
+        )
+
+        store2 = ScratchpadStore(data_path=str(tmp_path))
+        assert [s.agent_id for s in store2.list_scratchpads()] == ["agent-1"]
+
+    def test_index_shared_between_stores(self, tmp_path):
+        """Test that stores sharing a directory see each other's changes."""
+        store1 = ScratchpadStore(data_path=str(tmp_path))
+        store2 = ScratchpadStore(data_path=str(tmp_path))
+        for store, agent in [(store1, "agent-1"), (store2, "agent-2"), (store1, "agent-3")]:
+            store.create_scratchpad(ScratchpadCreate(
+                project_id="proj-1", agent_id=agent, content="x"
+            ))
+        store2.delete_scratchpad("proj-1", "agent-1")
+
+        assert sorted(s.agent_id for s in store1.list_scratchpads()) == ["agent-2", "agent-3"]
+        store3 = ScratchpadStore(data_path=str(tmp_path))
+        assert sorted(s.agent_id for s in store3.list_scratchpads()) == ["agent-2", "agent-3"]
+
     def test_filename_sanitization(self, scratchpad_store):
         """Test that special characters in IDs are handled safely."""
         create = ScratchpadCreate(
@@ -0,0 +1,291 @@
+"""Unit tests for the MCP server tool handlers."""
+
+import asyncio
+import time
+from datetime import datetime
+from typing import List
+from unittest.mock import MagicMock
+
+import pytest
+
+import src.server as server
+from src.memory_store import MemoryStore
+from src.models import Memory, MemoryCreate, MemoryMetadata
+from src.scratchpad_store import ScratchpadStore
+
+
+def _memories_for(creates: List[MemoryCreate]) -> List[Memory]:
+    """Build the memories store_memories would return for some requests."""
+    now = datetime.now()
+    return [
+        Memory(
+            memory_id=f"mem-{create.content}",
+            project_id=create.project_id,
+            agent_id=create.agent_id,
+            content=create.content,
+            metadata=create.metadata,
+            embedding_provider="local",
+            embedding_model="test-model",
+            created_at=now,
+            updated_at=now
+        )
+        for create in creates
+    ]
+
+
+def _create(content: str, agent_id: str = "agent-1") -> MemoryCreate:
+    """Build a store request for the test project."""
+    return MemoryCreate(project_id="proj-1", agent_id=agent_id, content=content)
+
+
+@pytest.fixture
+def mock_memory_store(monkeypatch):
+    """Install mock stores as the server's initialized stores."""
+    store = MagicMock(spec=MemoryStore)
+    store.store_memories.side_effect = _memories_for
+    monkeypatch.setattr(server, "memory_store", store)
+    monkeypatch.setattr(server, "scratchpad_store", MagicMock(spec=ScratchpadStore))
+    monkeypatch.setattr(server, "_stores_ready", None)
+    return store
+
+
+class TestStoreCoalescing:
+    """Test batching of concurrent store_memory calls."""
+
+    async def test_concurrent_calls_share_one_batch(self, mock_memory_store):
+        """Test that calls in one window are written with one store_memories call."""
+        memories = await asyncio.gather(
+            *(server._store_coalesced(_create(content)) for content in ["a", "b", "c"])
+        )
+
+        mock_memory_store.store_memories.assert_called_once()
+        batch = mock_memory_store.store_memories.call_args.args[0]
+        assert [create.content for create in batch] == ["a", "b", "c"]
+        assert [memory.memory_id for memory in memories] == ["mem-a", "mem-b", "mem-c"]
+
+    async def test_results_follow_callers_across_collections(self, mock_memory_store):
+        """Test that each caller gets its own memory when the batch spans agents."""
+        creates = [_create("a", "agent-1"), _create("b", "agent-2"), _create("c", "agent-1")]
+        memories = await asyncio.gather(*(server._store_coalesced(c) for c in creates))
+
+        assert [(m.agent_id, m.content) for m in memories] == [
+            ("agent-1", "a"), ("agent-2", "b"), ("agent-1", "c")
+        ]
+        assert mock_memory_store.store_memories.call_count == 2
+
+    async def test_failing_request_fails_only_its_caller(self, mock_memory_store):
+        """Test that an error is raised to the failing caller alone."""
+        def store_memories(creates):
+            if any(create.content == "bad" for create in creates):
+                raise ValueError("embedding failed")
+            return _memories_for(creates)
+        mock_memory_store.store_memories.side_effect = store_memories
+
+        results = await asyncio.gather(
+            *(server._store_coalesced(_create(content)) for content in ["a", "bad", "c"]),
+            return_exceptions=True
+        )
+
+        assert results[0].memory_id == "mem-a"
+        assert isinstance(results[1], ValueError)
+        assert results[2].memory_id == "mem-c"
+        # The failed batch wrote nothing; each request was retried alone
+        stored = [
+            [create.content for create in call.args[0]]
+            for call in mock_memory_store.store_memories.call_args_list
+        ]
+        assert stored == [["a", "bad", "c"], ["a"], ["bad"], ["c"]]
+
+    async def test_single_failing_request_is_not_retried(self, mock_memory_store):
+        """Test that a lone failing request raises without a second attempt."""
+        mock_memory_store.store_memories.side_effect = ValueError("embedding failed")
+
+        with pytest.raises(ValueError, match="embedding failed"):
+            await server._store_coalesced(_create("a"))
+        mock_memory_store.store_memories.assert_called_once()
+
+    async def test_cancelled_caller_does_not_affect_others(self, mock_memory_store):
+        """Test that cancelling one waiting caller leaves the rest of the batch intact."""
+        cancelled = asyncio.ensure_future(server._store_coalesced(_create("a")))
+        kept = asyncio.ensure_future(server._store_coalesced(_create("b")))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+
+        memory = await kept
+
+        assert memory.memory_id == "mem-b"
+        assert cancelled.cancelled()
+        assert server._pending_stores == []
+        batch = mock_memory_store.store_memories.call_args.args[0]
+        assert [create.content for create in batch] == ["b"]
+
+    async def test_cancelled_write_cancels_callers(self, mock_memory_store, monkeypatch):
+        """Test that callers are cancelled, not left waiting, when the write is cancelled."""
+        async def cancelled_to_thread(func, *args):
+            raise asyncio.CancelledError
+        monkeypatch.setattr(server.asyncio, "to_thread", cancelled_to_thread)
+
+        results = await asyncio.wait_for(asyncio.gather(
+            *(server._store_coalesced(_create(content)) for content in ["a", "b"]),
+            return_exceptions=True
+        ), timeout=1)
+
+        assert all(isinstance(result, asyncio.CancelledError) for result in results)
+        mock_memory_store.store_memories.assert_not_called()
+
+
+class TestStoreInitialization:
+    """Test background store initialization and how tool calls wait for it."""
+
+    @pytest.fixture
+    def uninitialized(self, monkeypatch):
+        """Reset the server to its state before initialization."""
+        monkeypatch.setattr(server, "memory_store", None)
+        monkeypatch.setattr(server, "scratchpad_store", None)
+        monkeypatch.setattr(server, "_stores_ready", None)
+
+    async def test_tool_call_waits_for_initialization(self, uninitialized, monkeypatch):
+        """Test that a tool call made during startup runs once the stores exist."""
+        def init_stores():
+            time.sleep(0.05)
+            monkeypatch.setattr(server, "memory_store", MagicMock(spec=MemoryStore))
+            monkeypatch.setattr(server, "scratchpad_store", MagicMock(spec=ScratchpadStore))
+        monkeypatch.setattr(server, "_init_stores", init_stores)
+        monkeypatch.setattr(server, "_stores_ready", server._start_init_stores())
+
+        result = await server.call_tool("get_memory_suggestions", {})
+
+        assert result[0].text == server._SUGGESTIONS_TEXT
+
+    async def test_failed_initialization_is_reported(self, uninitialized, monkeypatch, caplog):
+        """Test that tools report uninitialized stores when initialization fails."""
+        monkeypatch.setattr(
+            server, "get_embedding_provider", MagicMock(side_effect=RuntimeError("no model"))
+        )
+        monkeypatch.setattr(server, "_stores_ready", server._start_init_stores())
+
+        result = await server.call_tool("get_memory_suggestions", {})
+
+        assert [content.text for content in result] == ["Error: Stores not initialized"]
+        assert "Failed to initialize: no model" in caplog.text
+        assert isinstance(server._stores_ready.exception(), RuntimeError)
+
+
+class TestToolDispatch:
+    """Test that call_tool routes every tool to its handler."""
+
+    def test_every_tool_has_a_handler(self):
+        """Test that the handler table covers exactly the listed tools."""
+        assert {tool.name for tool in server._TOOLS} == set(server._HANDLERS)
+
+    async def test_unknown_tool(self, mock_memory_store):
+        """Test that an unknown tool name returns the unknown-tool error."""
+        result = await server.call_tool("forget_everything", {})
+
+        assert [content.text for content in result] == ["Unknown tool: forget_everything"]
+
+    async def test_handler_error_is_reported(self, mock_memory_store):
+        """Test that an exception in a handler is returned as an error message."""
+        mock_memory_store.get_memory.side_effect = RuntimeError("disk full")
+
+        result = await server.call_tool(
+            "get_memory", {"project_id": "proj-1", "agent_id": "agent-1", "memory_id": "m"}
+        )
+
+        assert [content.text for content in result] == ["Error executing get_memory: disk full"]
+
+
+class TestStoreMemoriesTool:
+    """Test the store_memories tool."""
+
+    async def test_items_become_memory_creates(self, mock_memory_store):
+        """Test that each item is stored for the call's project and agent."""
+        result = await server.call_tool("store_memories", {
+            "project_id": "proj-1",
+            "agent_id": "agent-1",
+            "memories": [
+                {"content": "first", "metadata": {"category": "fact"}},
+                {"content": "second"},
+            ]
+        })
+
+        creates = mock_memory_store.store_memories.call_args.args[0]
+        assert [(c.project_id, c.agent_id, c.content, c.metadata) for c in creates] == [
+            ("proj-1", "agent-1", "first", {"category": "fact"}),
+            ("proj-1", "agent-1", "second", {}),
+        ]
+        assert result[0].text == (
+            "Stored 2 memories successfully!\n\n"
+            "- Memory ID: mem-first\n"
+            "- Memory ID: mem-second\n"
+        )
+
+    @pytest.mark.parametrize("item, message", [
+        ({"content": "   "}, "Content cannot be empty"),
+        ({"content": "ok", "metadata": ["not", "a", "dict"]}, "metadata"),
+    ])
+    async def test_invalid_item_stores_nothing(self, mock_memory_store, item, message):
+        """Test that one invalid item rejects the whole call before anything is stored."""
+        result = await server.call_tool("store_memories", {
+            "project_id": "proj-1",
+            "agent_id": "agent-1",
+            "memories": [{"content": "valid"}, item]
+        })
+
+        assert result[0].text.startswith("Error executing store_memories:")
+        assert message in result[0].text
+        mock_memory_store.store_memories.assert_not_called()
+
+
+class TestListMemoriesTool:
+    """Test the list_memories tool output."""
+
+    @pytest.mark.parametrize("metadata, summary", [
+        ({"category": "fact", "tags": ["api", "auth"], "importance": 9}, "category: fact, 2 tags"),
+        ({"tags": ["api"]}, "1 tag"),
+        ({"category": "decision"}, "category: decision"),
+        ({"tags": "not-a-list", "source": "docs"}, "-"),
+        ({}, "-"),
+    ])
+    def test_metadata_summary(self, metadata, summary):
+        """Test that metadata is summarized as its category and tag count."""
+        assert server._metadata_summary(metadata) == summary
+
+    @pytest.fixture
+    def listed(self, mock_memory_store):
+        """Make list_memories return one memory with category, tags and importance."""
+        now = datetime(2025, 1, 2, 3, 4, 5)
+        mock_memory_store.list_memories.return_value = [MemoryMetadata.model_construct(
+            memory_id="mem-1",
+            project_id="proj-1",
+            agent_id="agent-1",
+            metadata={"category": "fact", "tags": ["api", "auth"], "importance": 9},
+            embedding_provider="local",
+            embedding_model="test-model",
+            created_at=now,
+            updated_at=now
+        )]
+
+    async def test_list_shows_summary_by_default(self, listed):
+        """Test that list_memories shows a metadata summary unless verbose is set."""
+        result = await server.call_tool(
+            "list_memories", {"project_id": "proj-1", "agent_id": "agent-1"}
+        )
+
+        assert [content.text for content in result] == [
+            "Found 1 memories:\n\n",
+            "- ID: mem-1\n"
+            "  Summary: category: fact, 2 tags\n"
+            "  Created: 2025-01-02 03:04:05\n"
+            "  Updated: 2025-01-02 03:04:05\n\n",
+        ]
+
+    async def test_list_verbose_shows_full_metadata(self, listed):
+        """Test that verbose list_memories shows each memory's metadata as JSON."""
+        result = await server.call_tool(
+            "list_memories", {"project_id": "proj-1", "agent_id": "agent-1", "verbose": True}
+        )
+
+        assert result[1].text.splitlines()[1] == (
+            '  Metadata: {"category":"fact","tags":["api","auth"],"importance":9}'
+        )
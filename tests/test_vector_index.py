@@ -0,0 +1,199 @@
+"""Unit tests for the quantized vector index."""
+
+import pytest
+import numpy as np
+import src.vector_index
+from src.vector_index import QuantizedIndex, _binarize, _popcount_rows, _quantize_int8
+
+
+@pytest.fixture
+def vectors():
+    """Create a reproducible set of random embeddings."""
+    rng = np.random.default_rng(42)
+    return rng.standard_normal((200, 32)).astype(np.float32)
+
+
+class TestQuantizeInt8:
+    """Test int8 scalar quantization."""
+
+    def test_range_maps_to_int8(self):
+        """Test that [-vmax, vmax] maps onto [-127, 127]."""
+        codes = _quantize_int8(np.array([[-0.5, 0.0, 0.25, 0.5]]), vmax=0.5)
+        assert codes.dtype == np.int8
+        assert codes.tolist() == [[-127, 0, 64, 127]]
+
+    def test_out_of_range_values_are_clipped(self):
+        """Test that values beyond vmax saturate instead of overflowing."""
+        codes = _quantize_int8(np.array([[-2.0, 2.0]]), vmax=1.0)
+        assert codes.tolist() == [[-127, 127]]
+
+    def test_per_row_ranges(self):
+        """Test that each row can be quantized over its own range."""
+        vectors = np.array([[0.1, -0.05], [1.0, 0.5]])
+        codes = _quantize_int8(vectors, vmax=np.array([[0.1], [1.0]]))
+        assert codes.tolist() == [[127, -64], [127, 64]]
+
+
+class TestBinarize:
+    """Test 1-bit quantization."""
+
+    def test_sign_bits_are_packed(self):
+        """Test that positive components set bits, most significant first."""
+        codes = _binarize(np.array([[0.5, -0.1, 0.2, 0.0, -1.0, 0.3, 0.1, -0.2, 0.9]]))
+        assert codes.dtype == np.uint8
+        assert codes.tolist() == [[0b10100110, 0b10000000]]
+
+    def test_popcount_rows(self):
+        """Test that set bits are counted per row."""
+        codes = np.array([[0b11111111, 0b00000001], [0, 0]], dtype=np.uint8)
+        assert _popcount_rows(codes).tolist() == [9, 0]
+
+
+class TestQuantizedIndex:
+    """Test QuantizedIndex operations."""
+
+    def test_invalid_quantization_raises_error(self):
+        """Test that unsupported modes are rejected."""
+        with pytest.raises(ValueError, match="Unknown quantization mode"):
+            QuantizedIndex("int4")
+
+    def test_search_empty_index(self):
+        """Test that searching an empty index returns no candidates."""
+        index = QuantizedIndex()
+        assert index.search([0.1, 0.2], k=5) == []
+
+    def test_search_finds_nearest_vector(self, vectors):
+        """Test that a query close to a stored vector ranks it first."""
+        index = QuantizedIndex()
+        ids = [f"mem-{i}" for i in range(len(vectors))]
+        index.add(ids, vectors)
+
+        query = vectors[17] + 0.01
+        candidates = index.search(query, k=5)
+
+        assert len(index) == 200
+        assert len(candidates) == 5
+        assert candidates[0] == "mem-17"
+
+    @pytest.mark.parametrize("quantization", ["fp32", "fp16", "int8", "binary"])
+    def test_search_finds_nearest_vector_in_each_mode(self, vectors, quantization):
+        """Test nearest-neighbour lookup with every quantization mode."""
+        index = QuantizedIndex(quantization)
+        index.add([f"mem-{i}" for i in range(len(vectors))], vectors)
+
+        assert index.search(vectors[42] * 1.5, k=3)[0] == "mem-42"
+
+    def test_search_recall_against_exact(self, vectors):
+        """Test that overfetched int8 candidates contain the exact top results."""
+        index = QuantizedIndex()
+        index.add([str(i) for i in range(len(vectors))], vectors)
+        query = np.random.default_rng(7).standard_normal(32).astype(np.float32)
+
+        normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        exact_top = {str(i) for i in np.argsort(-(normalized @ query))[:5]}
+
+        assert exact_top <= set(index.search(query, k=20))
+
+    def test_int8_scores_approximate_cosine(self, vectors):
+        """Test that rescaled int8 scores stay close to exact cosine similarity."""
+        index = QuantizedIndex("int8")
+        # Mix spiky and dense vectors so a single shared range would clip or waste bits
+        spiky = np.eye(32, dtype=np.float32)[:8] * 10 + vectors[:8] * 0.1
+        mixed = np.vstack([vectors, spiky])
+        index.add([str(i) for i in range(len(mixed))], mixed)
+        query = np.random.default_rng(7).standard_normal((1, 32)).astype(np.float32)
+        query /= np.linalg.norm(query)
+
+        normalized = mixed / np.linalg.norm(mixed, axis=1, keepdims=True)
+        np.testing.assert_allclose(index._scores(query), normalized @ query[0], atol=0.02)
+
+    def test_fp16_ranking_matches_exact(self, vectors):
+        """Test that half-precision storage preserves the exact top results."""
+        index = QuantizedIndex("fp16")
+        index.add([str(i) for i in range(len(vectors))], vectors)
+        query = np.random.default_rng(7).standard_normal(32).astype(np.float32)
+
+        normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        exact_top = [str(i) for i in np.argsort(-(normalized @ query))[:5]]
+
+        assert index._codes.dtype == np.float16
+        assert index.search(query, k=5) == exact_top
+
+    def test_fp32_scores_are_exact_cosine(self, vectors):
+        """Test that the unquantized index returns exact cosine similarities."""
+        index = QuantizedIndex("fp32")
+        index.add([str(i) for i in range(len(vectors))], vectors)
+        query = np.random.default_rng(7).standard_normal(32).astype(np.float32)
+
+        normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        exact = normalized @ (query / np.linalg.norm(query))
+        expected = np.argsort(-exact)[:5]
+
+        ids, scores = index.search_with_scores(query, k=5)
+        assert index.exact
+        assert ids == [str(i) for i in expected]
+        np.testing.assert_allclose(scores, exact[expected], rtol=1e-5)
+
+    def test_k_larger_than_index(self, vectors):
+        """Test that k is capped at the number of stored vectors."""
+        index = QuantizedIndex()
+        index.add(["a", "b"], vectors[:2])
+        assert sorted(index.search(vectors[0], k=10)) == ["a", "b"]
+
+    def test_add_existing_id_replaces_vector(self, vectors):
+        """Test that re-adding an ID overwrites its vector."""
+        index = QuantizedIndex()
+        index.add(["a", "b"], vectors[:2])
+        index.add(["a"], [vectors[5]])
+
+        assert len(index) == 2
+        assert index.search(vectors[5], k=1) == ["a"]
+
+    @pytest.mark.parametrize("quantization", ["fp32", "fp16", "int8", "binary"])
+    def test_remove(self, vectors, quantization):
+        """Test that removed vectors are no longer returned."""
+        index = QuantizedIndex(quantization)
+        index.add(["a", "b", "c"], vectors[:3])
+        index.remove(["a", "unknown"])
+
+        assert len(index) == 2
+        assert "a" not in index
+        assert index.search(vectors[2], k=1) == ["c"]
+        assert sorted(index.search(vectors[0], k=5)) == ["b", "c"]
+
+    def test_grows_beyond_initial_capacity(self, vectors):
+        """Test that adding vectors one at a time keeps all of them."""
+        index = QuantizedIndex()
+        for i, vector in enumerate(vectors):
+            index.add([str(i)], [vector])
+
+        assert len(index) == len(vectors)
+        assert index.search(vectors[150], k=1) == ["150"]
+
+
+@pytest.mark.skipif(src.vector_index.simsimd is None, reason="simsimd not installed")
+class TestSimSIMDScan:
+    """Test that the SimSIMD kernels agree with the NumPy scan."""
+
+    @pytest.mark.parametrize("quantization", ["fp16", "int8", "binary"])
+    def test_scores_match_numpy(self, vectors, quantization, monkeypatch):
+        """Test that both scan paths score every vector the same."""
+        index = QuantizedIndex(quantization)
+        index.add([str(i) for i in range(len(vectors))], vectors)
+        query = np.random.default_rng(7).standard_normal((1, 32)).astype(np.float32)
+        query /= np.linalg.norm(query)
+
+        simd_scores = index._scores(query)
+        monkeypatch.setattr(src.vector_index, "simsimd", None)
+        numpy_scores = index._scores(query)
+
+        np.testing.assert_allclose(simd_scores, numpy_scores, atol=5e-3)
+
+    @pytest.mark.parametrize("quantization", ["fp16", "int8", "binary"])
+    def test_search_without_simsimd(self, vectors, quantization, monkeypatch):
+        """Test that search falls back to NumPy when SimSIMD is unavailable."""
+        monkeypatch.setattr(src.vector_index, "simsimd", None)
+        index = QuantizedIndex(quantization)
+        index.add([f"mem-{i}" for i in range(len(vectors))], vectors)
+
+        assert index.search(vectors[42] * 1.5, k=3)[0] == "mem-42"